@@ -31,7 +31,7 @@ def _check_list_strings(label: str, items: List[str]) -> List[str]:
         raise EntityError(f"{label} must be a list of str")
     return [_check_and_sanitize(f"{label}[]", x) for x in items]
 
-@dataclass
+@dataclass(slots=True)
 class User:
     id: str
     name: str
@@ -40,14 +40,14 @@ class User:
         self.id = _check_and_sanitize("User.id", self.id)
         self.name = _check_and_sanitize("User.name", self.name)
 
-@dataclass
+@dataclass(slots=True)
 class Database:
     name: str
 
     def __post_init__(self):
         self.name = _check_and_sanitize("Database.name", self.name)
 
-@dataclass
+@dataclass(slots=True)
 class Index:
     name: str
     fields: List[str]
@@ -56,7 +56,7 @@ class Index:
         self.name = _check_and_sanitize("Index.name", self.name)
         self.fields = _check_list_strings("Index.fields", self.fields)
 
-@dataclass
+@dataclass(slots=True)
 class Table:
     name: str
     indexes: Dict[str, 'Index']
@@ -78,7 +78,7 @@ class Table:
         if self.keys is not None:
             self.keys = _check_list_strings("Table.keys", self.keys)
 
-@dataclass
+@dataclass(slots=True)
 class Record:
     id: str
     data: Dict[str, Any] = field(default_factory=dict)
@@ -93,6 +93,11 @@ class EnvConfig:
         """Get the data storage path"""
         return os.getenv('NATURALDB_DATA_PATH', './data')
     
+    @staticmethod
+    def get_durability() -> str:
+        """Get the durability mode: 'sync' flushes writes to disk, 'none' skips fsync"""
+        return os.getenv('NATURALDB_DURABILITY', 'sync')
+    
     @staticmethod
     def get_base_path() -> str:
         """Get the base path (legacy)"""
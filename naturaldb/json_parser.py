@@ -3,10 +3,34 @@ Custom JSON Parser for NaturalDB
 This implementation doesn't use the external json library as required by the README.
 """
 
-from typing import Any, Dict, List, Union, Optional
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union, Optional
 from .errors import NaturalDBError
 
 
+# Characters that must be escaped inside a JSON string, and their escapes
+_ESCAPE_TABLE = {code: f'\\u{code:04x}' for code in range(32)}
+_ESCAPE_TABLE.update({
+    ord('"'): '\\"',
+    ord('\\'): '\\\\',
+    ord('\b'): '\\b',
+    ord('\f'): '\\f',
+    ord('\n'): '\\n',
+    ord('\r'): '\\r',
+    ord('\t'): '\\t',
+})
+_NEEDS_ESCAPE = re.compile(r'["\\\x00-\x1f]')
+# A JSON number, with the fraction and exponent groups telling floats from ints
+_NUMBER = re.compile(r'-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# A complete JSON string, escapes included
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# What matters when skipping over an object or array: its strings, which may
+# hold brackets, and the brackets themselves; a lone quote is an unterminated string
+_STRUCTURE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]|"')
+
+
 class JSONParserError(NaturalDBError):
     """Custom exception for JSON parsing errors"""
     def __init__(self, message: str):
@@ -52,6 +76,25 @@ class JSONParser:
         parser = _JSONStringParser(json_str)
         return parser.parse()
     
+    @staticmethod
+    def parse_field(json_str: str, field_path: str) -> Any:
+        """
+        Parse only the value at a field path of a JSON object, skipping over
+        everything else without building it, so a small part of a large
+        document costs little more than a scan of the text.
+        Skipped values are not validated, and for a repeated key the first
+        occurrence is used.
+        
+        Args:
+            json_str: JSON string holding an object
+            field_path: Field path (e.g., 'specs.storage' or 'name')
+            
+        Returns:
+            Parsed value of the field (None if not found)
+        """
+        parser = _JSONStringParser(json_str)
+        return parser.parse_field(field_path.split('.'))
+    
     @staticmethod
     def to_json_string(obj: Any, indent: Optional[int] = None) -> str:
         """
@@ -65,6 +108,39 @@ class JSONParser:
             JSON string representation
         """
         return _JSONStringBuilder.build(obj, indent)
+    
+    @staticmethod
+    def to_json_strings(objs: Iterable[Any], indent: Optional[int] = None) -> List[str]:
+        """
+        Convert several Python objects to JSON strings, encoding any dict or
+        list they share (the same object, not merely an equal one) only once.
+        The objects must not be modified while they are converted.
+        
+        Args:
+            objs: Python objects to convert
+            indent: Number of spaces for indentation (None for compact)
+            
+        Returns:
+            JSON string representation of each object, in order
+        """
+        builder = _MemoizingJSONStringBuilder()
+        return [builder._build_value(obj, 0, indent) for obj in objs]
+    
+    @staticmethod
+    def iter_json_string(obj: Any, indent: Optional[int] = None) -> Iterator[str]:
+        """
+        Convert a Python object to JSON text in chunks, one per top-level item.
+        Joining the chunks gives exactly to_json_string(obj, indent), but large
+        objects can be written out without building the whole string first.
+        
+        Args:
+            obj: Python object to convert
+            indent: Number of spaces for indentation (None for compact)
+            
+        Returns:
+            Iterator over pieces of the JSON string representation
+        """
+        return _JSONStringBuilder.iter_build(obj, indent)
 
 
 class _JSONStringParser:
@@ -89,6 +165,79 @@ class _JSONStringParser:
         
         return result
     
+    def parse_field(self, keys: List[str]) -> Any:
+        """Parse only the value reached by following keys through nested objects"""
+        for key in keys:
+            self._skip_whitespace()
+            if self.pos >= self.length or self.json_str[self.pos] != '{':
+                return None
+            if not self._seek_key(key):
+                return None
+        return self._parse_value()
+    
+    def _seek_key(self, key: str) -> bool:
+        """Move to the value of key in the object at pos; False if it has none"""
+        self.pos += 1  # Skip opening brace
+        self._skip_whitespace()
+        
+        if self.pos < self.length and self.json_str[self.pos] == '}':
+            return False
+        
+        while True:
+            self._skip_whitespace()
+            if self.pos >= self.length or self.json_str[self.pos] != '"':
+                raise JSONParserError("Expected string key in object")
+            name = self._parse_string()
+            
+            self._skip_whitespace()
+            if self.pos >= self.length or self.json_str[self.pos] != ':':
+                raise JSONParserError("Expected ':' after object key")
+            self.pos += 1  # Skip colon
+            
+            if name == key:
+                return True
+            self._skip_value()
+            
+            self._skip_whitespace()
+            if self.pos >= self.length:
+                raise JSONParserError("Unterminated object")
+            char = self.json_str[self.pos]
+            self.pos += 1
+            if char == '}':
+                return False
+            if char != ',':
+                raise JSONParserError(f"Expected ',' or '}}' in object at position {self.pos - 1}")
+    
+    def _skip_value(self) -> None:
+        """Move past a JSON value without building it"""
+        self._skip_whitespace()
+        if self.pos >= self.length:
+            raise JSONParserError("Unexpected end of JSON")
+        
+        char = self.json_str[self.pos]
+        if char == '"':
+            match = _STRING.match(self.json_str, self.pos)
+            if match is None:
+                raise JSONParserError("Unterminated string")
+            self.pos = match.end()
+        elif char in '{[':
+            depth = 0
+            for match in _STRUCTURE.finditer(self.json_str, self.pos):
+                token = match.group()
+                if token[0] == '"':
+                    if len(token) == 1:
+                        raise JSONParserError("Unterminated string")
+                elif token in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = match.end()
+                        return
+            raise JSONParserError("Unterminated object or array")
+        else:
+            self._parse_value()
+    
     def _parse_value(self) -> Any:
         """Parse a JSON value"""
         self._skip_whitespace()
@@ -122,6 +271,15 @@ class _JSONStringParser:
         
         self.pos += 1  # Skip opening quote
         start = self.pos
+        
+        # Most strings have no escapes: find the closing quote in C and slice
+        end = self.json_str.find('"', start)
+        if end == -1:
+            raise JSONParserError("Unterminated string")
+        if self.json_str.find('\\', start, end) == -1:
+            self.pos = end + 1
+            return self.json_str[start:end]
+        
         result = []
         
         while self.pos < self.length:
@@ -194,7 +352,9 @@ class _JSONStringParser:
             if self.pos >= self.length or self.json_str[self.pos] != '"':
                 raise JSONParserError("Expected string key in object")
             
-            key = self._parse_string()
+            # Interned, so every record shares one copy of each field name and
+            # key comparisons between records succeed on identity
+            key = sys.intern(self._parse_string())
             
             self._skip_whitespace()
             
@@ -262,60 +422,27 @@ class _JSONStringParser:
         return result
     
     def _parse_number(self) -> Union[int, float]:
-        """Parse a JSON number"""
-        start = self.pos
-        
-        # Handle negative sign
-        if self.json_str[self.pos] == '-':
-            self.pos += 1
-        
-        # Parse integer part
-        if self.pos >= self.length or not self.json_str[self.pos].isdigit():
+        """Parse a JSON number, matched in one pass of a precompiled pattern"""
+        match = _NUMBER.match(self.json_str, self.pos)
+        if match is None:
             raise JSONParserError("Invalid number format")
-        
-        if self.json_str[self.pos] == '0':
-            self.pos += 1
-        else:
-            while self.pos < self.length and self.json_str[self.pos].isdigit():
-                self.pos += 1
-        
-        is_float = False
-        
-        # Parse decimal part
-        if self.pos < self.length and self.json_str[self.pos] == '.':
-            is_float = True
-            self.pos += 1
-            
-            if self.pos >= self.length or not self.json_str[self.pos].isdigit():
-                raise JSONParserError("Invalid number format")
-            
-            while self.pos < self.length and self.json_str[self.pos].isdigit():
-                self.pos += 1
-        
-        # Parse exponent part
-        if self.pos < self.length and self.json_str[self.pos] in 'eE':
-            is_float = True
-            self.pos += 1
-            
-            if self.pos < self.length and self.json_str[self.pos] in '+-':
-                self.pos += 1
-            
-            if self.pos >= self.length or not self.json_str[self.pos].isdigit():
+        end = match.end()
+        fraction, exponent = match.groups()
+        # A fraction or exponent the pattern couldn't take in is malformed
+        if end < self.length and exponent is None:
+            char = self.json_str[end]
+            if char in 'eE' or (char == '.' and fraction is None):
                 raise JSONParserError("Invalid number format")
-            
-            while self.pos < self.length and self.json_str[self.pos].isdigit():
-                self.pos += 1
+        self.pos = end
         
-        number_str = self.json_str[start:self.pos]
-        
-        try:
-            return float(number_str) if is_float else int(number_str)
-        except ValueError:
-            raise JSONParserError(f"Invalid number: {number_str}")
+        number_str = match.group()
+        if fraction is None and exponent is None:
+            return int(number_str)
+        return float(number_str)
     
     def _parse_literal(self, literal: str, value: Any) -> Any:
         """Parse a JSON literal (true, false, null)"""
-        if not self.json_str[self.pos:].startswith(literal):
+        if not self.json_str.startswith(literal, self.pos):
             raise JSONParserError(f"Expected '{literal}' at position {self.pos}")
         
         self.pos += len(literal)
@@ -323,8 +450,10 @@ class _JSONStringParser:
     
     def _skip_whitespace(self):
         """Skip whitespace characters"""
-        while self.pos < self.length and self.json_str[self.pos] in ' \t\n\r':
-            self.pos += 1
+        # Compact JSON has no whitespace to skip, so check one character
+        # before handing a run of it to the precompiled pattern
+        if self.pos < self.length and self.json_str[self.pos] in ' \t\n\r':
+            self.pos = _WHITESPACE.match(self.json_str, self.pos).end()
 
 
 class _JSONStringBuilder:
@@ -333,11 +462,45 @@ class _JSONStringBuilder:
     @staticmethod
     def build(obj: Any, indent: Optional[int] = None) -> str:
         """Build JSON string from Python object"""
-        builder = _JSONStringBuilder()
-        return builder._build_value(obj, 0, indent)
+        return _BUILDER._build_value(obj, 0, indent)
+    
+    @staticmethod
+    def iter_build(obj: Any, indent: Optional[int] = None) -> Iterator[str]:
+        """Build JSON string from Python object, yielding one top-level item at a time"""
+        builder = _BUILDER
+        if not isinstance(obj, (dict, list)) or not obj:
+            yield builder._build_value(obj, 0, indent)
+            return
+        
+        is_dict = isinstance(obj, dict)
+        opening, closing = ('{', '}') if is_dict else ('[', ']')
+        if indent is None:
+            separator, item_prefix, end = ',', '', closing
+        else:
+            separator, item_prefix, end = ',\n', ' ' * indent, '\n' + closing
+            opening += '\n'
+        
+        items = obj.items() if is_dict else enumerate(obj)
+        for i, (key, value) in enumerate(items):
+            chunk = separator + item_prefix if i else opening + item_prefix
+            if is_dict:
+                chunk += builder._build_string(key) + (':' if indent is None else ': ')
+            yield chunk + builder._build_value(value, 0 if indent is None else 1, indent)
+        yield end
     
     def _build_value(self, obj: Any, depth: int, indent: Optional[int]) -> str:
         """Build JSON string for a value"""
+        # Exact-type checks for the common cases first; subclasses and the
+        # remaining types fall through to the general checks below
+        kind = type(obj)
+        if kind is str:
+            return self._build_string(obj)
+        if kind is int or kind is float:
+            return str(obj)
+        if kind is dict:
+            return self._build_object(obj, depth, indent)
+        if kind is list:
+            return self._build_array(obj, depth, indent)
         if obj is None:
             return 'null'
         elif obj is True:
@@ -357,64 +520,76 @@ class _JSONStringBuilder:
     
     def _build_string(self, s: str) -> str:
         """Build JSON string representation"""
-        result = ['"']
-        
-        for char in s:
-            if char == '"':
-                result.append('\\"')
-            elif char == '\\':
-                result.append('\\\\')
-            elif char == '\b':
-                result.append('\\b')
-            elif char == '\f':
-                result.append('\\f')
-            elif char == '\n':
-                result.append('\\n')
-            elif char == '\r':
-                result.append('\\r')
-            elif char == '\t':
-                result.append('\\t')
-            elif ord(char) < 32:
-                result.append(f'\\u{ord(char):04x}')
-            else:
-                result.append(char)
-        
-        result.append('"')
-        return ''.join(result)
+        # Only strings that need escaping go through the translation table
+        if _NEEDS_ESCAPE.search(s) is None:
+            return '"' + s + '"'
+        return '"' + s.translate(_ESCAPE_TABLE) + '"'
     
     def _build_array(self, arr: List[Any], depth: int, indent: Optional[int]) -> str:
         """Build JSON array representation"""
         if not arr:
             return '[]'
         
+        build_value = self._build_value
         if indent is None:
-            items = [self._build_value(item, depth, indent) for item in arr]
+            items = [build_value(item, depth, indent) for item in arr]
             return '[' + ','.join(items) + ']'
         else:
-            items = []
-            for item in arr:
-                item_str = self._build_value(item, depth + 1, indent)
-                items.append(' ' * ((depth + 1) * indent) + item_str)
-            
-            return '[\n' + ',\n'.join(items) + '\n' + ' ' * (depth * indent) + ']'
+            # Indentation is built once per container, not once per item
+            pad = ' ' * ((depth + 1) * indent)
+            items = [build_value(item, depth + 1, indent) for item in arr]
+            return '[\n' + pad + (',\n' + pad).join(items) + '\n' + ' ' * (depth * indent) + ']'
     
     def _build_object(self, obj: Dict[str, Any], depth: int, indent: Optional[int]) -> str:
         """Build JSON object representation"""
         if not obj:
             return '{}'
         
+        build_string = self._build_string
+        build_value = self._build_value
         if indent is None:
-            items = []
-            for key, value in obj.items():
-                key_str = self._build_string(key)
-                value_str = self._build_value(value, depth, indent)
-                items.append(f'{key_str}:{value_str}')
+            items = [
+                build_string(key) + ':' + build_value(value, depth, indent)
+                for key, value in obj.items()
+            ]
             return '{' + ','.join(items) + '}'
         else:
-            items = []
-            for key, value in obj.items():
-                key_str = self._build_string(key)
-                value_str = self._build_value(value, depth + 1, indent)
-                items.append(' ' * ((depth + 1) * indent) + f'{key_str}: {value_str}')
-            
-            return '{\n' + ',\n'.join(items) + '\n' + ' ' * (depth * indent) + '}'
\ No newline at end of file
+            pad = ' ' * ((depth + 1) * indent)
+            items = [
+                build_string(key) + ': ' + build_value(value, depth + 1, indent)
+                for key, value in obj.items()
+            ]
+            return '{\n' + pad + (',\n' + pad).join(items) + '\n' + ' ' * (depth * indent) + '}'
+
+
+class _MemoizingJSONStringBuilder(_JSONStringBuilder):
+    """
+    Builder that encodes each non-empty dict and list once per nesting depth,
+    however many times it is reached. Objects are recognized by identity, so
+    an instance must only live while the objects it has seen are alive and
+    unchanged, e.g. for one to_json_strings call.
+    """
+    
+    def __init__(self) -> None:
+        # (id of container, depth) -> its JSON; depth matters for indentation
+        self._memo: Dict[Tuple[int, int], str] = {}
+    
+    def _build_array(self, arr: List[Any], depth: int, indent: Optional[int]) -> str:
+        """Build JSON array representation, reusing an earlier encoding of it"""
+        key = (id(arr), depth)
+        encoded = self._memo.get(key)
+        if encoded is None:
+            encoded = self._memo[key] = super()._build_array(arr, depth, indent)
+        return encoded
+    
+    def _build_object(self, obj: Dict[str, Any], depth: int, indent: Optional[int]) -> str:
+        """Build JSON object representation, reusing an earlier encoding of it"""
+        key = (id(obj), depth)
+        encoded = self._memo.get(key)
+        if encoded is None:
+            encoded = self._memo[key] = super()._build_object(obj, depth, indent)
+        return encoded
+
+
+# The builder keeps no state between calls, so one instance serves every call and thread
+_BUILDER = _JSONStringBuilder()
@@ -1,63 +1,81 @@
 import threading
-from collections import defaultdict
 
 class RWLock:
     """A Read-Write lock allowing multiple readers or one writer."""
     def __init__(self):
         self._readers = 0
         self._writer = False
-        self._cond = threading.Condition()
+        # Threads blocked in wait(); releases skip the notify when there are none
+        self._waiting = 0
+        # Entered through the plain lock, which is cheaper than entering the
+        # condition; the condition is only used to wait and notify under it
+        self._mutex = threading.Lock()
+        self._cond = threading.Condition(self._mutex)
+
+    def _wait(self):
+        self._waiting += 1
+        try:
+            self._cond.wait()
+        finally:
+            self._waiting -= 1
 
     def acquire_read(self):
-        with self._cond:
+        with self._mutex:
             while self._writer:
-                self._cond.wait()
+                self._wait()
             self._readers += 1
 
     def release_read(self):
-        with self._cond:
+        with self._mutex:
             self._readers -= 1
-            if self._readers == 0:
+            if self._readers == 0 and self._waiting:
                 self._cond.notify_all()
 
     def acquire_write(self):
-        with self._cond:
+        with self._mutex:
             while self._writer or self._readers > 0:
-                self._cond.wait()
+                self._wait()
             self._writer = True
 
     def release_write(self):
-        with self._cond:
+        with self._mutex:
             self._writer = False
-            self._cond.notify_all()
+            if self._waiting:
+                self._cond.notify_all()
+
+
+# Number of RW locks paths are spread over; a power of two so a mask picks the stripe
+LOCK_STRIPES = 64
 
 
 class LockManager:
-    """Manages RW locks per file path."""
+    """
+    Manages RW locks per file path.
+    Paths are hashed onto a fixed set of striped locks: the same path always
+    gets the same lock, distinct paths rarely share one, and looking a lock
+    up needs no global lock. Callers never hold two paths' locks at once, so
+    two paths sharing a stripe cannot deadlock.
+    """
     def __init__(self):
-        self._locks = defaultdict(RWLock)
-        self._global_lock = threading.Lock()
+        self._locks = tuple(RWLock() for _ in range(LOCK_STRIPES))
 
     def get_lock(self, path: str) -> RWLock:
-        with self._global_lock:
-            return self._locks[path]
+        return self._locks[hash(path) & (LOCK_STRIPES - 1)]
 
     # ---- Public API ----
+    # Each method picks the stripe inline rather than through get_lock, as
+    # they run on every file operation
     def acquire_read(self, path: str):
-        lock = self.get_lock(path)
-        lock.acquire_read()
+        self._locks[hash(path) & (LOCK_STRIPES - 1)].acquire_read()
 
     def release_read(self, path: str):
-        lock = self.get_lock(path)
-        lock.release_read()
+        self._locks[hash(path) & (LOCK_STRIPES - 1)].release_read()
 
     def acquire_write(self, path: str):
-        lock = self.get_lock(path)
-        lock.acquire_write()
+        self._locks[hash(path) & (LOCK_STRIPES - 1)].acquire_write()
 
     def release_write(self, path: str):
-        lock = self.get_lock(path)
-        lock.release_write()
+        self._locks[hash(path) & (LOCK_STRIPES - 1)].release_write()
 
 # Singleton instance
 lock_manager = LockManager()
\ No newline at end of file
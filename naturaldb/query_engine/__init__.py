@@ -3,5 +3,6 @@
 
 from .query_engine import QueryEngine
 from .operations import QueryOperations, JoinOperations, TableQuery
+from .columnar import ColumnarTable
 
-__all__ = ['QueryEngine', 'QueryOperations', 'JoinOperations', 'TableQuery']
\ No newline at end of file
+__all__ = ['QueryEngine', 'QueryOperations', 'JoinOperations', 'TableQuery', 'ColumnarTable']
\ No newline at end of file
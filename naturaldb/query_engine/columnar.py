@@ -0,0 +1,248 @@
+"""
+Columnar table representation for NaturalDB
+Holds a table as one list of values per top-level field, so projections and
+renames work on whole columns instead of rebuilding every row.
+"""
+
+from copy import deepcopy
+from itertools import repeat
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from ..entities import Record
+from .operations import QueryOperations
+
+
+class ColumnarTable:
+    """
+    Column-oriented copy of a table's records.
+    Every column has row_count values; a record without a field has None there.
+
+    A table built from records keeps each row as a tuple laid out by a
+    per-table schema (field name -> position) rather than as a dict, and
+    materializes a column the first time it is asked for, so fields no query
+    touches are never turned into columns.
+
+    Tables returned by project(), rename() and head() are views that may share
+    column lists with the table they came from, so only append to a table
+    built with from_records().
+    """
+
+    def __init__(
+        self,
+        columns: Optional[Dict[str, List[Any]]] = None,
+        row_count: int = 0,
+        nested: Optional[Set[str]] = None,
+    ):
+        self.columns: Dict[str, List[Any]] = columns if columns is not None else {}
+        self.row_count = row_count
+        # Columns holding dicts or lists; their values are copied on the way out
+        self._nested: Set[str] = nested if nested is not None else set()
+        # Source rows for columns not materialized yet, laid out by _schema; None for views
+        self._rows: Optional[List[Tuple[Any, ...]]] = None if columns is not None else []
+        self._schema: Dict[str, int] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Record]) -> 'ColumnarTable':
+        """
+        Build a columnar table from records.
+
+        Args:
+            records: Records to load, in row order
+
+        Returns:
+            ColumnarTable holding the records' data
+        """
+        table = cls()
+        table.extend(record.data for record in records)
+        return table
+
+    def append(self, data: Dict[str, Any]) -> None:
+        """
+        Append one row; columns it doesn't have get None.
+
+        Args:
+            data: Field values of the row
+        """
+        self.extend((data,))
+
+    def extend(self, rows_data: Iterable[Dict[str, Any]]) -> None:
+        """
+        Append many rows at once; columns a row doesn't have get None.
+        The rows are packed into tuples by the schema, growing it for new
+        fields, and each column materialized so far is then extended once
+        with all the new values, rather than once per row.
+
+        Args:
+            rows_data: Field values of each row
+        """
+        rows = self._rows
+        if rows is None:
+            raise ValueError("Cannot append to a ColumnarTable view")
+
+        schema = self._schema
+        layout = tuple(schema)
+        start = len(rows)
+        grown = False
+        for data in rows_data:
+            if tuple(data) == layout:
+                # Same fields in schema order, the usual case: no per-field work
+                rows.append(tuple(data.values()))
+                continue
+            for name in data:
+                if name not in schema:
+                    schema[name] = len(schema)
+                    grown = True
+            layout = tuple(schema)
+            rows.append(tuple(map(data.get, layout)))
+
+        if grown:
+            # Rows packed before the schema grew are short; pad them with None
+            width = len(schema)
+            for i, row in enumerate(rows):
+                if len(row) < width:
+                    rows[i] = row + (None,) * (width - len(row))
+
+        added = rows[start:]
+        for name, column in self.columns.items():
+            index = schema.get(name)
+            if index is None:
+                column.extend(repeat(None, len(added)))
+                continue
+            values = list(map(itemgetter(index), added))
+            column.extend(values)
+            if any(isinstance(value, (dict, list)) for value in values):
+                self._nested.add(name)
+        self.row_count = len(rows)
+
+    def column(self, field_path: str) -> List[Any]:
+        """
+        Get the values of a field for every row.
+        Top-level fields return the stored column itself, materializing it on
+        first use; dotted paths are resolved against their top-level column.
+
+        Args:
+            field_path: Field path (e.g., 'specs.storage' or 'name')
+
+        Returns:
+            List of row_count values (None where the field is missing)
+        """
+        if '.' not in field_path:
+            column = self.columns.get(field_path)
+            if column is None:
+                if self._rows is None:
+                    return [None] * self.row_count
+                index = self._schema.get(field_path)
+                if index is None:
+                    column = [None] * self.row_count
+                else:
+                    column = list(map(itemgetter(index), self._rows))
+                self.columns[field_path] = column
+                if any(isinstance(value, (dict, list)) for value in column):
+                    self._nested.add(field_path)
+            return column
+
+        head, rest = field_path.split('.', 1)
+        base = self.column(head)
+        get_field = QueryOperations._compile_field_getter(rest)
+        return [get_field(value) if isinstance(value, dict) else None for value in base]
+
+    def project(self, fields: List[str]) -> 'ColumnarTable':
+        """
+        Keep only the given fields, named by their field paths.
+        Only the columns these fields need are materialized.
+
+        Args:
+            fields: Field paths to keep
+
+        Returns:
+            ColumnarTable view with one column per field
+        """
+        # Dotted fields under the same top-level field are read in one walk
+        # over its column, sharing lookups of their common prefixes
+        groups: Dict[str, List[str]] = {}
+        for field in fields:
+            if '.' in field:
+                groups.setdefault(field.split('.', 1)[0], []).append(field)
+
+        shared: Dict[str, List[Any]] = {}
+        for head, group in groups.items():
+            if len(group) < 2 or not self.row_count:
+                continue
+            read_paths = QueryOperations._compile_path_reader(
+                tuple(field.split('.', 1)[1] for field in group)
+            )
+            missing = (None,) * len(group)
+            values = [read_paths(value) if isinstance(value, dict) else missing for value in self.column(head)]
+            for field, column in zip(group, zip(*values)):
+                shared[field] = list(column)
+
+        columns = {field: shared[field] if field in shared else self.column(field) for field in fields}
+        nested = {field for field in columns if field.split('.', 1)[0] in self._nested}
+        return ColumnarTable(columns, self.row_count, nested)
+
+    def rename(self, field_mapping: Dict[str, str]) -> 'ColumnarTable':
+        """
+        Rename columns; only the column map is rebuilt, no rows are touched.
+
+        Args:
+            field_mapping: Dictionary mapping current column names to new names
+
+        Returns:
+            ColumnarTable view with renamed columns
+        """
+        columns = {
+            field_mapping.get(name, name): column
+            for name, column in self._field_columns().items()
+        }
+        nested = {field_mapping.get(name, name) for name in self._nested}
+        return ColumnarTable(columns, self.row_count, nested)
+
+    def head(self, count: int) -> 'ColumnarTable':
+        """
+        Keep the first count rows.
+
+        Args:
+            count: Maximum number of rows
+
+        Returns:
+            ColumnarTable view with at most count rows
+        """
+        if count >= self.row_count:
+            return self
+        columns = {name: column[:count] for name, column in self._field_columns().items()}
+        return ColumnarTable(columns, len(range(self.row_count)[:count]), set(self._nested))
+
+    def to_rows(self, indices: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Materialize the table as one dictionary per row.
+        Nested values are copied, so callers can't modify the table through them.
+
+        Args:
+            indices: Optional row indices to materialize, in output order;
+                     the rows are gathered while the dicts are built, without
+                     an intermediate table
+
+        Returns:
+            List of row dictionaries
+        """
+        field_columns = self._field_columns()
+        names = list(field_columns)
+        if not names:
+            return [{} for _ in range(self.row_count if indices is None else len(indices))]
+
+        columns = []
+        for name, column in field_columns.items():
+            values = column if indices is None else map(column.__getitem__, indices)
+            columns.append(map(deepcopy, values) if name in self._nested else values)
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def _field_columns(self) -> Dict[str, List[Any]]:
+        """
+        Get a column for every field of the table, materializing as needed.
+
+        Returns:
+            Dictionary mapping field names to columns
+        """
+        if self._rows is None:
+            return self.columns
+        return {name: self.column(name) for name in self._schema}
@@ -3,7 +3,8 @@ Query Operations for NaturalDB
 Implements filtering, projection, grouping, aggregation, and join operations.
 """
 
-from typing import Any, Dict, List, Optional, Union, Callable
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union, Callable
 from ..entities import User, Database, Table, Record
 from ..storage_system.storage import TableStorage
 
@@ -42,8 +43,22 @@ class QueryOperations:
         Returns:
             List of filtered records
         """
+        get_field = QueryOperations._compile_field_getter(field_name)
+        
+        if operator == "contains" and isinstance(value, str):
+            # Hoisted substring test: skips the operator chain and only calls str() on non-strings
+            needle = value
+            
+            def contains(record: Record) -> bool:
+                field_value = get_field(record.data)
+                if field_value.__class__ is not str:
+                    field_value = str(field_value)
+                return needle in field_value
+            
+            return QueryOperations.filter(records, contains)
+
         def condition(record: Record) -> bool:
-            field_value = QueryOperations._get_nested_field(record.data, field_name)
+            field_value = get_field(record.data)
             
             if operator == "eq":
                 return field_value == value
@@ -82,12 +97,16 @@ class QueryOperations:
         Returns:
             List of dictionaries containing only the specified fields
         """
+        if not any('.' in field for field in fields):
+            project_row = QueryOperations._compile_projector(tuple((field, field) for field in fields))
+            return [project_row(record.data) for record in records]
+        
+        getters = [(field, QueryOperations._compile_field_getter(field)) for field in fields]
         result = []
         for record in records:
             projected = {}
-            for field in fields:
-                field_value = QueryOperations._get_nested_field(record.data, field)
-                QueryOperations._set_nested_field(projected, field, field_value)
+            for field, get_field in getters:
+                QueryOperations._set_nested_field(projected, field, get_field(record.data))
             result.append(projected)
         
         return result
@@ -104,9 +123,10 @@ class QueryOperations:
         Returns:
             Dictionary mapping field values to lists of records
         """
+        get_field = QueryOperations._compile_field_getter(field_name)
         groups = {}
         for record in records:
-            group_key = QueryOperations._get_nested_field(record.data, field_name)
+            group_key = get_field(record.data)
             if group_key not in groups:
                 groups[group_key] = []
             groups[group_key].append(record)
@@ -165,8 +185,10 @@ class QueryOperations:
         Returns:
             Sorted list of records
         """
+        get_field = QueryOperations._compile_field_getter(field_name)
+
         def sort_key(record: Record):
-            value = QueryOperations._get_nested_field(record.data, field_name)
+            value = get_field(record.data)
             # Handle None values by putting them at the end
             return (value is None, value)
         
@@ -213,6 +235,123 @@ class QueryOperations:
         
         return current
     
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _compile_field_getter(field_path: str) -> Callable[[Dict[str, Any]], Any]:
+        """
+        Compile a getter equivalent to _get_nested_field for a fixed field path.
+        Dotted paths are turned into straight-line code once, so each record
+        costs a few dict lookups instead of a split() and a Python loop.
+        
+        Args:
+            field_path: Field path (e.g., 'specs.storage' or 'name')
+            
+        Returns:
+            Function mapping a record's data to the field value (None if not found)
+        """
+        if '.' not in field_path:
+            return lambda data: data.get(field_path)
+        
+        *parents, leaf = field_path.split('.')
+        # Segments are embedded with repr(), so any key compiles to a plain string literal
+        lines = ["def get_field(data):"]
+        for part in parents:
+            lines.append(f"    data = data.get({part!r})")
+            lines.append("    if not isinstance(data, dict):")
+            lines.append("        return None")
+        lines.append(f"    return data.get({leaf!r})")
+        
+        namespace: Dict[str, Any] = {}
+        exec("\n".join(lines), namespace)
+        return namespace["get_field"]
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _compile_projector(pairs: Tuple[Tuple[str, str], ...]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Compile a function building a flat output dict from a record's data,
+        e.g. (('user_id', 'id'), ('profile.name', 'name')) becomes
+        
+            def project(data):
+                value_0 = data.get('user_id')
+                value_1 = data.get('profile')
+                value_2 = value_1.get('name') if isinstance(value_1, dict) else None
+                return {'id': value_0, 'name': value_2}
+        
+        Dotted paths are walked inline, so a nested field costs one lookup
+        per segment and no extra function call.
+        
+        Args:
+            pairs: (field_path, output_name) pairs in output order
+            
+        Returns:
+            Function mapping a record's data to the projected dict
+        """
+        lines, names = QueryOperations._emit_path_walk([field_path for field_path, _ in pairs])
+        items = [f"{output_name!r}: {name}" for (_, output_name), name in zip(pairs, names)]
+        lines.insert(0, "def project(data, isinstance=isinstance, dict=dict):")
+        lines.append(f"    return {{{', '.join(items)}}}")
+        
+        namespace: Dict[str, Any] = {}
+        exec("\n".join(lines), namespace)
+        return namespace["project"]
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _compile_path_reader(field_paths: Tuple[str, ...]) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+        """
+        Compile a function reading several field paths from a dict at once.
+        
+        Args:
+            field_paths: Field paths to read (e.g., ('name', 'contact.email'))
+            
+        Returns:
+            Function mapping a dict to a tuple of the paths' values (None if not found)
+        """
+        lines, names = QueryOperations._emit_path_walk(field_paths)
+        lines.insert(0, "def read_paths(data, isinstance=isinstance, dict=dict):")
+        lines.append(f"    return ({''.join(name + ', ' for name in names)})")
+        
+        namespace: Dict[str, Any] = {}
+        exec("\n".join(lines), namespace)
+        return namespace["read_paths"]
+    
+    @staticmethod
+    def _emit_path_walk(field_paths: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Emit statements reading field paths from a dict named data.
+        The paths are walked as a trie of their segments: a prefix shared by
+        several paths (e.g. 'profile.contact' in 'profile.contact.email' and
+        'profile.contact.phone') is looked up once, not once per path.
+        
+        Args:
+            field_paths: Field paths to read
+            
+        Returns:
+            (lines, names): the statements, and the variable holding each path's value
+        """
+        lines: List[str] = []
+        # Trie of the paths, flattened: segment prefix -> variable holding its value
+        nodes: Dict[Tuple[str, ...], str] = {}
+        
+        def walk(prefix: Tuple[str, ...]) -> str:
+            name = nodes.get(prefix)
+            if name is None:
+                if len(prefix) == 1:
+                    name = f"value_{len(nodes)}"
+                    lines.append(f"    {name} = data.get({prefix[0]!r})")
+                else:
+                    parent = walk(prefix[:-1])
+                    name = f"value_{len(nodes)}"
+                    lines.append(
+                        f"    {name} = {parent}.get({prefix[-1]!r}) if isinstance({parent}, dict) else None"
+                    )
+                nodes[prefix] = name
+            return name
+        
+        names = [walk(tuple(field_path.split('.'))) for field_path in field_paths]
+        return lines, names
+    
     @staticmethod
     def _set_nested_field(data: Dict[str, Any], field_path: str, value: Any) -> None:
         """
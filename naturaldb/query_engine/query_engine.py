@@ -3,12 +3,44 @@ Main Query Engine for NaturalDB Layer 2
 Provides high-level interface for database operations and query execution.
 """
 
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from itertools import compress, repeat
+from operator import contains, eq, ge, gt, le, lt, ne, not_
 import os
+import sys
+import time
 from ..entities import User, Database, Table, Record
-from ..storage_system.storage import Storage, DatabaseStorage, TableStorage
+from ..storage_system.storage import Storage, DatabaseStorage, TableStorage, MTIME_SETTLE_NS
 from ..json_parser import JSONParser
 from .operations import QueryOperations, JoinOperations, TableQuery
+from .columnar import ColumnarTable
+
+# Comparison operators that map directly onto a two-argument function
+OP_TABLE: Dict[str, Callable[[Any, Any], Any]] = {
+    "eq": eq,
+    "ne": ne,
+    "gt": gt,
+    "gte": ge,
+    "lt": lt,
+    "lte": le,
+}
+
+# Evaluation order of conditions. Equality and membership tests never raise,
+# so they can safely run first, equality first since it rejects the most rows
+# for the least work. Ordering comparisons and contains can raise on a value an
+# earlier condition would have filtered out, so they share one rank and keep
+# the caller's order.
+SELECTIVITY_RANK: Dict[str, int] = {
+    "eq": 0,
+    "in": 1,
+    "ne": 2,
+    "nin": 2,
+    "gt": 3,
+    "gte": 3,
+    "lt": 3,
+    "lte": 3,
+    "contains": 3,
+}
 
 
 class QueryEngine:
@@ -21,6 +53,10 @@ class QueryEngine:
         self.database = database
         self.storage = Storage()
         self.database_storage = DatabaseStorage(user, database)
+        # table name -> (table folder mtime, columnar copy of its records)
+        self._tables: Dict[str, Tuple[int, ColumnarTable]] = {}
+        # table name -> storage handle, so paths and folders are resolved once per table
+        self._table_storages: Dict[str, TableStorage] = {}
 
         # Ensure database exists
         if not os.path.exists(self.database_storage.base_path):
@@ -82,14 +118,44 @@ class QueryEngine:
         Returns:
             TableStorage instance or None if table doesn't exist
         """
+        table_storage = self._table_storages.get(table_name)
+        if table_storage is not None:
+            if not os.path.isdir(table_storage.base_path):
+                del self._table_storages[table_name]
+                return None
+            # Other engines may have written to the table since the handle was last used
+            table_storage.clear_cache()
+            return table_storage
+
         table = Table(name=table_name, indexes={})
         table_path = self.database_storage.get_table_path(table)
 
         if not os.path.exists(table_path):
             return None
 
-        return TableStorage(self.user, self.database, table)
+        table_storage = TableStorage(self.user, self.database, table)
+        self._table_storages[table_name] = table_storage
+        return table_storage
     
+    def _get_or_create_table_storage(self, table_name: str) -> Optional[TableStorage]:
+        """
+        Get table storage for a table, creating the table if it doesn't exist.
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            TableStorage instance or None if the table couldn't be created
+        """
+        table_storage = self.get_table_storage(table_name)
+        if table_storage is None:
+            # Create table if it doesn't exist
+            table = Table(name=table_name, indexes={})
+            if not self.create_table(table):
+                return None
+            table_storage = self.get_table_storage(table_name)
+        return table_storage
+
     def _load_all_records(self, table_name: str) -> List[Record]:
         """
         Internal method to load all records from a table.
@@ -107,6 +173,43 @@ class QueryEngine:
         records_dict = table_storage.load_all_records()
         return list(records_dict.values())
 
+    def _load_columnar(self, table_name: str) -> Optional[ColumnarTable]:
+        """
+        Internal method to get a table in columnar form.
+        The columnar copy is kept and reused for as long as the table folder's
+        mtime is unchanged; every record write replaces a file in that folder.
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            ColumnarTable of the table's records, or None if the table doesn't exist
+        """
+        table_storage = self._table_storages.get(table_name)
+        if table_storage is not None:
+            table_path = table_storage.base_path
+        else:
+            table_path = self.database_storage.get_table_path(Table(name=table_name, indexes={}))
+        try:
+            mtime = os.stat(table_path).st_mtime_ns
+        except FileNotFoundError:
+            self._tables.pop(table_name, None)
+            return None
+
+        cached = self._tables.get(table_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        loaded_at = time.time_ns()
+        table_storage = self.get_table_storage(table_name)
+        if table_storage is None:
+            return None
+        columnar = ColumnarTable.from_records(table_storage.load_all_records().values())
+        # A folder modified within MTIME_SETTLE_NS may change again without its mtime moving
+        if loaded_at - mtime > MTIME_SETTLE_NS:
+            self._tables[table_name] = (mtime, columnar)
+        return columnar
+
     def insert(self, table_name: str, record: Record) -> bool:
         """
         Insert a record into a table.
@@ -119,15 +222,7 @@ class QueryEngine:
             True if record was inserted successfully
         """
         try:
-            table_storage = self.get_table_storage(table_name)
-            if table_storage is None:
-                # Create table if it doesn't exist
-                table = Table(name=table_name, indexes={})
-                if not self.create_table(table):
-                    return False
-                table_storage = self.get_table_storage(table_name)
-
-            # Ensure table_storage is not None before accessing its attributes
+            table_storage = self._get_or_create_table_storage(table_name)
             if table_storage is None:
                 return False
 
@@ -137,6 +232,28 @@ class QueryEngine:
             print(f"Error inserting record: {e}")
             return False
 
+    def insert_many(self, table_name: str, records: List[Record]) -> bool:
+        """
+        Insert several records into a table as one batch.
+
+        Args:
+            table_name: Name of the table
+            records: Records to insert
+
+        Returns:
+            True if all records were inserted successfully
+        """
+        try:
+            table_storage = self._get_or_create_table_storage(table_name)
+            if table_storage is None:
+                return False
+
+            table_storage.save_records_batch(records)
+            return True
+        except Exception as e:
+            print(f"Error inserting records: {e}")
+            return False
+
     def find_by_id(self, table_name: str, record_id: str) -> Optional[Record]:
         """
         Find a record by ID in a table.
@@ -153,8 +270,8 @@ class QueryEngine:
             return None
 
         try:
-            return table_storage.load_record(record_id)
-        except (FileNotFoundError, OSError):
+            return table_storage.find_record(record_id)
+        except OSError:
             return None
 
     def find_all(self, table_name: str) -> List[Record]:
@@ -186,8 +303,7 @@ class QueryEngine:
                 return False
 
             # Check if record exists
-            existing = self.find_by_id(table_name, record.id)
-            if not existing:
+            if not table_storage.record_exists(record.id):
                 return False
 
             table_storage.save_record(record)
@@ -213,8 +329,7 @@ class QueryEngine:
                 return False
 
             # Check if record exists
-            existing = self.find_by_id(table_name, record_id)
-            if not existing:
+            if not table_storage.record_exists(record_id):
                 return False
 
             table_storage.delete_record(record_id)
@@ -224,7 +339,12 @@ class QueryEngine:
             return False
 
     def filter(
-        self, table_name: str, field_name: str, value: Any, operator: str = "eq"
+        self,
+        table_name: str,
+        field_name: str,
+        value: Any,
+        operator: str = "eq",
+        records: Optional[List[Record]] = None,
     ) -> List[Record]:
         """
         Filter records in a table by field value.
@@ -234,11 +354,13 @@ class QueryEngine:
             field_name: Name of the field to filter by
             value: Value to compare against
             operator: Comparison operator
+            records: Optional already-loaded records to use instead of reading the table
 
         Returns:
             List of filtered records
         """
-        records = self._load_all_records(table_name)
+        if records is None:
+            records = self._load_all_records(table_name)
         if not records:
             return []
 
@@ -249,6 +371,7 @@ class QueryEngine:
         table_name: str,
         fields: List[str],
         conditions: Optional[Dict[str, Any]] = None,
+        records: Optional[List[Record]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Project specific fields from records, optionally with filtering.
@@ -257,29 +380,19 @@ class QueryEngine:
             table_name: Name of the table
             fields: List of field names to include
             conditions: Optional filtering conditions
+            records: Optional already-loaded records to use instead of reading the table
 
         Returns:
             List of projected records
         """
-        records = self._load_all_records(table_name)
+        if records is None:
+            records = self._load_all_records(table_name)
         if not records:
             return []
 
         # Apply filtering if conditions are provided
         if conditions:
-            for field_name, condition in conditions.items():
-                if isinstance(condition, dict):
-                    operator = condition.get("operator", "eq")
-                    value = condition.get("value")
-                else:
-                    operator = "eq"
-                    value = condition
-
-                records = [
-                    r
-                    for r in records
-                    if self._evaluate_condition(r, field_name, value, operator)
-                ]
+            records = list(filter(self._compile_predicate(conditions), records))
 
         return QueryOperations.project(records, fields)
 
@@ -308,78 +421,49 @@ class QueryEngine:
             # SELECT user_id AS id FROM users WHERE age > 30
             engine.rename('users', {'user_id': 'id'}, {'age': {'operator': 'gt', 'value': 30}})
         """
-        records = self._load_all_records(table_name)
-        if not records:
-            return []
-
-        # Apply filtering if conditions are provided
-        if conditions:
-            for field_name, condition in conditions.items():
-                if isinstance(condition, dict):
-                    operator = condition.get("operator", "eq")
-                    value = condition.get("value")
-                else:
-                    operator = "eq"
-                    value = condition
-
-                records = [
-                    r
-                    for r in records
-                    if self._evaluate_condition(r, field_name, value, operator)
-                ]
-
-        # Rename fields in each record
-        result = []
-        for record in records:
-            renamed_record = {}
-            for original_field, new_field in field_mapping.items():
-                # Support nested field access
-                field_value = QueryOperations._get_nested_field(record.data, original_field)
-                renamed_record[new_field] = field_value
-            result.append(renamed_record)
-
-        return result
+        return self._scan(table_name, list(field_mapping), field_mapping, conditions)
 
     def select(
         self,
         from_table: str,  # FROM
-        fields: str = "*",  # SELECT
+        fields: Union[str, List[str]] = "*",  # SELECT
         where: Optional[Dict[str, Any]] = None,  # WHERE
         group_by: Optional[str] = None,  # GROUP BY
         having: Optional[Dict[str, Any]] = None,  # HAVING
         order_by: Optional[str] = None,  # ORDER BY
         ascending: bool = True,  # ASC / DESC
         limit: Optional[int] = None,  # LIMIT
+        aliases: Optional[Dict[str, str]] = None,  # AS
     ) -> List[Dict[str, Any]]:
         """
         The all-in-one select method to support complex queries with\
             filtering, projection, renaming, grouping, sorting, and joining.
         Provide a flexible interface to perform SQL-like SELECT operations.
 
+        fields is "*", a comma-separated string or a list of field names.
+        aliases maps field names to output names; with aliases every selected
+        field becomes a flat key, like rename().
         """
+        field_list = None
+        if fields != "*":
+            field_list = fields if isinstance(fields, list) else fields.split(",")
+
+        if field_list is not None and not (group_by or having or order_by):
+            # Without aliases dotted fields are projected as nested dicts, which the row path handles
+            if aliases or not any("." in field for field in field_list):
+                return self._scan(from_table, field_list, aliases, where, limit)
+
         records = self._load_all_records(from_table)
         if not records:
             return []
 
         # Apply WHERE filtering
         if where:
-            for field_name, condition in where.items():
-                if isinstance(condition, dict):
-                    operator = condition.get("operator", "eq")
-                    value = condition.get("value")
-                else:
-                    operator = "eq"
-                    value = condition
-
-                records = [
-                    r
-                    for r in records
-                    if self._evaluate_condition(r, field_name, value, operator)
-                ]
+            records = list(filter(self._compile_predicate(where), records))
 
         # Apply GROUP BY
         if group_by:
-            grouped_result = self.group_by(from_table, group_by)
+            grouped_result = self.group_by(from_table, group_by, records=records)
             records = [
                 Record(id=str(i + 1), data={group_by: k, **v})
                 for i, (k, v) in enumerate(grouped_result.items())
@@ -387,23 +471,7 @@ class QueryEngine:
 
         # Apply HAVING filtering
         if having:
-            filtered_records = []
-            for record in records:
-                match = True
-                for field_name, condition in having.items():
-                    if isinstance(condition, dict):
-                        operator = condition.get("operator", "eq")
-                        value = condition.get("value")
-                    else:
-                        operator = "eq"
-                        value = condition
-
-                    if not self._evaluate_condition(record, field_name, value, operator):
-                        match = False
-                        break
-                if match:
-                    filtered_records.append(record)
-            records = filtered_records
+            records = list(filter(self._compile_predicate(having), records))
 
         # Apply ORDER BY
         if order_by:
@@ -414,17 +482,73 @@ class QueryEngine:
             records = QueryOperations.limit(records, limit)
 
         # Apply field selection and projection
-        if fields != "*":
-            records = QueryOperations.project(records, fields.split(","))
-            return [record for record in records]
+        if field_list is not None:
+            if aliases:
+                project_row = QueryOperations._compile_projector(
+                    tuple((field, aliases.get(field, field)) for field in field_list)
+                )
+                return [project_row(record.data) for record in records]
+            return QueryOperations.project(records, field_list)
+        elif aliases:
+            return [
+                {aliases.get(key, key): value for key, value in record.data.items()}
+                for record in records
+            ]
         else:
             return [record.data for record in records]
 
+    def _scan(
+        self,
+        table_name: str,
+        fields: List[str],
+        aliases: Optional[Dict[str, str]] = None,
+        conditions: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Shared core of select() and rename() over the columnar table:
+        filter, project and alias in one pass that builds a dict only for
+        each matching row.
+
+        Args:
+            table_name: Name of the table
+            fields: Field paths to project
+            aliases: Optional mapping of field paths to output names
+            conditions: Optional filtering conditions
+            limit: Optional limit on number of rows
+
+        Returns:
+            List of projected rows
+        """
+        table = self._load_columnar(table_name)
+        if table is None or table.row_count == 0:
+            # Nothing to scan: skip projection, predicate compilation and aliasing
+            return []
+
+        # Field names parsed from records are interned; interning the requested
+        # ones too lets column lookups match on identity
+        fields = [sys.intern(field) for field in fields]
+        if aliases:
+            aliases = {sys.intern(field): sys.intern(alias) for field, alias in aliases.items()}
+
+        projected = table.project(fields)
+        if aliases:
+            # Renaming only rebinds the column map, no rows are touched
+            projected = projected.rename(aliases)
+
+        rows = self._match_rows(table, conditions) if conditions else None
+        if limit:
+            if rows is None:
+                return projected.head(limit).to_rows()
+            rows = rows[:limit]
+        return projected.to_rows(rows)
+
     def group_by(
         self,
         table_name: str,
         field_name: str,
         aggregations: Optional[Dict[str, str]] = None,
+        records: Optional[List[Record]] = None,
     ) -> Dict[Any, Any]:
         """
         Group records by a field and optionally apply aggregations.
@@ -433,11 +557,13 @@ class QueryEngine:
             table_name: Name of the table
             field_name: Field to group by
             aggregations: Optional aggregations to apply {'field_name': 'operation'}
+            records: Optional already-loaded records to use instead of reading the table
 
         Returns:
             Dictionary of grouped results
         """
-        records = self._load_all_records(table_name)
+        if records is None:
+            records = self._load_all_records(table_name)
         if not records:
             return {}
 
@@ -467,6 +593,7 @@ class QueryEngine:
         field_name: str,
         ascending: bool = True,
         limit: Optional[int] = None,
+        records: Optional[List[Record]] = None,
     ) -> List[Record]:
         """
         Sort records in a table by a field.
@@ -476,11 +603,13 @@ class QueryEngine:
             field_name: Field to sort by
             ascending: Sort order
             limit: Optional limit on number of records
+            records: Optional already-loaded records to use instead of reading the table
 
         Returns:
             Sorted list of records
         """
-        records = self._load_all_records(table_name)
+        if records is None:
+            records = self._load_all_records(table_name)
         if not records:
             return []
 
@@ -492,10 +621,14 @@ class QueryEngine:
         return sorted_records
 
     def order_by(
-        self, table_name: str, field_name: str, ascending: bool = True
+        self,
+        table_name: str,
+        field_name: str,
+        ascending: bool = True,
+        records: Optional[List[Record]] = None,
     ) -> List[Record]:
         """Alias for sort method for more intuitive API."""
-        return self.sort(table_name, field_name, ascending)
+        return self.sort(table_name, field_name, ascending, records=records)
 
     def join(
         self,
@@ -635,42 +768,166 @@ class QueryEngine:
             print(f"Error listing tables: {e}")
             return []
 
-    def _evaluate_condition(
-        self, record: Record, field_name: str, value: Any, operator: str
-    ) -> bool:
+    @staticmethod
+    def _rank_conditions(conditions: Dict[str, Any]) -> List[Tuple[str, Any, str]]:
+        """
+        Normalize a conditions dict and order it by SELECTIVITY_RANK, so the
+        cheapest, most selective conditions reject a record before the others
+        are evaluated. Only conditions that can't raise are moved ahead; the
+        rest keep their given order, as one may guard the next.
+
+        Args:
+            conditions: {'field': value} or {'field': {'operator': op, 'value': value}}
+
+        Returns:
+            List of (field_name, value, operator) in evaluation order
+        """
+        ranked = []
+        for field_name, condition in conditions.items():
+            if isinstance(condition, dict):
+                operator = condition.get("operator", "eq")
+                value = condition.get("value")
+            else:
+                operator = "eq"
+                value = condition
+            ranked.append((field_name, value, operator))
+
+        # Unknown operators never match, so they reject records cheapest of all.
+        # sort() is stable: conditions of equal rank keep their given order.
+        ranked.sort(key=lambda item: SELECTIVITY_RANK.get(item[2], -1))
+        return ranked
+
+    @staticmethod
+    def _compile_predicate(conditions: Dict[str, Any]) -> Callable[[Record], bool]:
+        """
+        Compile a conditions dict into one predicate over records.
+        Operators are resolved once here instead of for every record.
+
+        Args:
+            conditions: {'field': value} or {'field': {'operator': op, 'value': value}}
+
+        Returns:
+            Function returning True if a record satisfies all conditions
         """
-        Evaluate a condition against a record.
+        predicates = [
+            QueryEngine._compile_condition(field_name, value, operator)
+            for field_name, value, operator in QueryEngine._rank_conditions(conditions)
+        ]
+
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda record: all(predicate(record) for predicate in predicates)
+
+    @staticmethod
+    def _compile_condition(
+        field_name: str, value: Any, operator: str
+    ) -> Callable[[Record], bool]:
+        """
+        Compile a single condition into a predicate over records.
 
         Args:
-            record: Record to evaluate
-            field_name: Field name to check
+            field_name: Field name to check (dot notation for nested fields)
             value: Value to compare
             operator: Comparison operator
 
         Returns:
-            True if condition is satisfied
-        """
-        field_value = QueryOperations._get_nested_field(record.data, field_name)
-
-        if operator == "eq":
-            return field_value == value
-        elif operator == "ne":
-            return field_value != value
-        elif operator == "gt":
-            return field_value > value
-        elif operator == "gte":
-            return field_value >= value
-        elif operator == "lt":
-            return field_value < value
-        elif operator == "lte":
-            return field_value <= value
-        elif operator == "in":
+            Function returning True if a record satisfies the condition
+        """
+        get_field = QueryOperations._compile_field_getter(field_name)
+
+        compare = OP_TABLE.get(operator)
+        if compare is not None:
+            return lambda record: compare(get_field(record.data), value)
+        test = QueryEngine._compile_value_test(value, operator)
+        return lambda record: test(get_field(record.data))
+
+    @staticmethod
+    def _compile_value_test(value: Any, operator: str) -> Callable[[Any], bool]:
+        """
+        Compile a single condition into a test on a field value.
+
+        Args:
+            value: Value to compare
+            operator: Comparison operator
+
+        Returns:
+            Function returning True if a field value satisfies the condition
+        """
+        compare = OP_TABLE.get(operator)
+        if compare is not None:
+            return lambda field_value: compare(field_value, value)
+        if operator == "in":
             # Check if field_value is in the list of values
-            return field_value in value if isinstance(value, list) else field_value == value
-        elif operator == "nin":
+            if isinstance(value, list):
+                return lambda field_value: field_value in value
+            return lambda field_value: field_value == value
+        if operator == "nin":
             # Check if field_value is not in the list of values
-            return field_value not in value if isinstance(value, list) else field_value != value
-        elif operator == "contains":
-            return value in str(field_value)
-        else:
-            return False
+            if isinstance(value, list):
+                return lambda field_value: field_value not in value
+            return lambda field_value: field_value != value
+        if operator == "contains":
+            return lambda field_value: value in str(field_value)
+        return lambda field_value: False
+
+    @staticmethod
+    def _match_rows(table: ColumnarTable, conditions: Dict[str, Any]) -> List[int]:
+        """
+        Find the rows of a columnar table that satisfy a conditions dict.
+        Each condition runs over a whole column as one map(), and only over the
+        rows earlier conditions kept, so every row sees the same comparisons as
+        with _compile_predicate.
+
+        Args:
+            table: Table to filter
+            conditions: {'field': value} or {'field': {'operator': op, 'value': value}}
+
+        Returns:
+            Indices of the matching rows, in row order
+        """
+        selected: Optional[List[int]] = None
+        for field_name, value, operator in QueryEngine._rank_conditions(conditions):
+            column = table.column(field_name)
+            if selected is None:
+                values = column
+                candidates: Iterable[int] = range(table.row_count)
+            else:
+                values = list(map(column.__getitem__, selected))
+                candidates = selected
+
+            mask = QueryEngine._column_mask(values, value, operator)
+            selected = list(compress(candidates, mask))
+            if not selected:
+                break
+
+        return selected if selected is not None else list(range(table.row_count))
+
+    @staticmethod
+    def _column_mask(values: List[Any], value: Any, operator: str) -> Iterable[Any]:
+        """
+        Evaluate a single condition over a column of field values.
+        Each operator is a chain of map() over C-implemented callables, so the
+        per-value loop never runs Python bytecode.
+
+        Args:
+            values: Field values, one per row
+            value: Value to compare
+            operator: Comparison operator
+
+        Returns:
+            Iterable of truth values, one per row
+        """
+        compare = OP_TABLE.get(operator)
+        if compare is not None:
+            return map(compare, values, repeat(value))
+        if operator == "in":
+            if isinstance(value, list):
+                return map(value.__contains__, values)
+            return map(eq, values, repeat(value))
+        if operator == "nin":
+            if isinstance(value, list):
+                return map(not_, map(value.__contains__, values))
+            return map(ne, values, repeat(value))
+        if operator == "contains":
+            return map(contains, map(str, values), repeat(value))
+        return repeat(False, len(values))
@@ -1,14 +1,76 @@
+import fcntl
+import mmap
 import os
 import shutil
+import threading
+from contextlib import contextmanager
+from ..env_config import config
 from ..lock import lock_manager
-from typing import Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from ..errors import NaturalDBError
 
+# Chunks passed to a single writev call; well under the usual IOV_MAX of 1024
+WRITEV_BATCH = 64
+# Files at least this large are memory-mapped when read
+MMAP_READ_THRESHOLD = 64 * 1024
+# Smallest read buffer kept per thread; smaller files are read into it as well
+READ_BUFFER_SIZE = 4096
+
+# Per-thread buffer that small files are read into, reused from read to read
+_read_buffers = threading.local()
+
 class FileSystemError(NaturalDBError):
     """Custom exception for FileSystem errors"""
     def __init__(self, message: str):
         super().__init__(message, type="FileSystemError")
 
+class _SyncGroups:
+    """
+    Group commit for fsync. Callers syncing the same path while a sync of it
+    is running wait for it to finish, then one of them syncs once on behalf
+    of all of them, so N concurrent callers cost two fsyncs instead of N.
+    A sync started after a caller asked covers everything it wrote before
+    asking.
+    """
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        # Path -> [requests so far, requests covered by a finished sync, whether a sync is running]
+        self._states: Dict[str, list] = {}
+
+    def sync(self, path: str, fsync: Callable[[], None]) -> None:
+        """
+        Return once a sync of path that started after this call has finished,
+        running fsync to perform one if no other caller is.
+        """
+        condition = self._condition
+        with condition:
+            state = self._states.setdefault(path, [0, 0, False])
+            state[0] += 1
+            ticket = state[0]
+            while state[1] < ticket and state[2]:
+                condition.wait()
+            if state[1] >= ticket:
+                return
+            state[2] = True
+            covered = state[0]
+        synced = False
+        try:
+            fsync()
+            synced = True
+        finally:
+            with condition:
+                state[2] = False
+                if synced:
+                    state[1] = covered
+                if state[1] == state[0]:
+                    # Nobody is waiting on this path any more
+                    del self._states[path]
+                condition.notify_all()
+
+
+_sync_groups = _SyncGroups()
+
+
 class FileSystem:
     """
     The file system for NaturalDB.
@@ -18,47 +80,384 @@ class FileSystem:
         pass
 
     @staticmethod
-    def create_file(path: str, content: Optional[str], recursive: bool = True) -> None:
+    def create_file(path: str, content: Optional[str], recursive: bool = True) -> Optional[os.stat_result]:
         """
         Create a file at the given path with the specified content.
+        The content is written to a temporary file and atomically renamed into place.
         If recursive is True, create parent directories as needed.
         Otherwise, assume parent directories already exist.
+        Returns the status of the file as written (None if content is None),
+        which stays accurate even if another writer replaces the file right after.
         """
         lock_manager.acquire_write(path)
         try:
             if recursive:
                 os.makedirs(os.path.dirname(path), exist_ok=True)
-            elif not os.path.exists(os.path.dirname(path)):
-                raise FileSystemError(f"Parent directory does not exist for path: {path}")
             if content is not None:
-                with open(path, 'w') as f:
-                    f.write(content)
+                return FileSystem._write_replacing(path, (content,))
+            elif not recursive and not os.path.exists(os.path.dirname(path)):
+                raise FileSystemError(f"Parent directory does not exist for path: {path}")
+            return None
         finally:
             lock_manager.release_write(path)
 
+    @staticmethod
+    def stream_file(path: str, chunks: Iterable[str], recursive: bool = True) -> None:
+        """
+        Create a file at the given path by writing the content chunk by chunk,
+        so the full content never has to be held in memory at once.
+        If recursive is True, create parent directories as needed.
+        """
+        lock_manager.acquire_write(path)
+        try:
+            if recursive:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            FileSystem._write_replacing(path, chunks, stat=False)
+        finally:
+            lock_manager.release_write(path)
+
+    @staticmethod
+    def create_files(folder: str, files: Iterable[Tuple[str, Iterable[str]]], sync: bool = False) -> None:
+        """
+        Create several files in one existing folder, each written from its
+        chunks and atomically renamed into place like create_file.
+        The folder is opened once and every file is created, renamed and
+        cleaned up relative to it, so the folder's path is not resolved again
+        for each file. If sync is True, the folder is synced once at the end,
+        unless durability is 'none' (see is_durable).
+
+        Args:
+            folder: Folder to create the files in
+            files: (file name, content chunks) pairs
+            sync: Whether to flush the folder's entries to disk afterwards
+        """
+        try:
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        except FileNotFoundError:
+            raise FileSystemError(f"Folder does not exist: {folder}")
+        try:
+            prefix = folder + '/'
+            for name, chunks in files:
+                path = prefix + name
+                lock_manager.acquire_write(path)
+                try:
+                    FileSystem._write_replacing(name, chunks, dir_fd=dir_fd, stat=False)
+                finally:
+                    lock_manager.release_write(path)
+            if sync and FileSystem.is_durable():
+                _sync_groups.sync(folder, lambda: os.fsync(dir_fd))
+        finally:
+            os.close(dir_fd)
+
+    @staticmethod
+    def _write_replacing(path: str, chunks: Iterable[str], dir_fd: Optional[int] = None, stat: bool = True) -> Optional[os.stat_result]:
+        """
+        Write chunks to a temporary sibling of path, then rename it over path
+        so readers never see a partial file. A missing parent directory is
+        reported by the open itself rather than probed for beforehand.
+        Nothing is fsynced here; rename atomicity keeps the file whole, and
+        callers that need durability sync the folder once per batch.
+        If dir_fd is given, path is relative to that open folder.
+        Returns the status of the written file, or None if stat is False to
+        save the fstat for callers that don't use it; the rename keeps the
+        file's inode, size and mtime.
+        An overwrite is never done in place: truncating and rewriting the
+        file would let readers see it partly written, and every save getting
+        a new inode is what lets cached content be checked with one stat.
+        """
+        # The lock serializes writers of a path within this process; the pid
+        # keeps writers in other processes off the same temporary file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666, dir_fd=dir_fd)
+        except FileNotFoundError:
+            raise FileSystemError(f"Parent directory does not exist for path: {path}")
+        try:
+            try:
+                # Encoded chunks go out in one writev per batch, skipping the
+                # buffered text layer; a single-chunk file is a single syscall
+                batch = []
+                for chunk in chunks:
+                    batch.append(chunk.encode('utf-8'))
+                    if len(batch) == WRITEV_BATCH:
+                        FileSystem._write_all(fd, batch)
+                        batch = []
+                if batch:
+                    FileSystem._write_all(fd, batch)
+                written = os.fstat(fd) if stat else None
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, path, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+            return written
+        except BaseException:
+            # Don't leave a half-written temporary file behind
+            try:
+                os.remove(tmp_path, dir_fd=dir_fd)
+            except FileNotFoundError:
+                pass
+            raise
+
+    @staticmethod
+    def _write_all(fd: int, buffers: List[bytes]) -> None:
+        """
+        Write the buffers to fd in order with writev, resuming after short writes.
+        """
+        while buffers:
+            written = os.writev(fd, buffers)
+            # Drop the buffers written in full and trim the one cut short
+            done = 0
+            while done < len(buffers) and written >= len(buffers[done]):
+                written -= len(buffers[done])
+                done += 1
+            buffers = buffers[done:]
+            if buffers and written:
+                buffers[0] = buffers[0][written:]
+
+    @staticmethod
+    def sync_folder(path: str) -> None:
+        """
+        Flush the folder's entries to disk, making earlier creates and renames in it durable.
+        One call covers any number of files written into the folder, and
+        concurrent calls for the same folder share a sync; see _SyncGroups.
+        """
+        FileSystem.sync_file(path)
+
+    @staticmethod
+    def is_durable() -> bool:
+        """
+        Whether syncs reach the disk. Setting NATURALDB_DURABILITY to 'none'
+        turns every fsync into a no-op, for runs such as the test suite that
+        don't need their writes to survive a crash.
+        """
+        return config.get_durability() != 'none'
+
+    @staticmethod
+    def sync_file(path: str) -> None:
+        """
+        Flush the file's content to disk. Concurrent calls for the same path
+        share a sync; see _SyncGroups. Does nothing when durability is 'none'.
+        """
+        if not FileSystem.is_durable():
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            _sync_groups.sync(path, lambda: os.fsync(fd))
+        finally:
+            os.close(fd)
+
     @staticmethod
     def read_file(path: str) -> Optional[str]:
         """
         Read the content of the file at the given path.
+        Returns None if the file does not exist.
+        """
+        lock_manager.acquire_read(path)
+        try:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                return None
+            try:
+                return FileSystem._read_fd(fd)
+            finally:
+                os.close(fd)
+        finally:
+            lock_manager.release_read(path)
+
+    @staticmethod
+    def read_files(folder: str, names: List[str]) -> List[Optional[str]]:
+        """
+        Read several files in one folder, in order.
+        The folder is opened once and every file is opened relative to it,
+        so the folder's path is not resolved again for each file.
+        Returns None for files that do not exist, or for every file if the
+        folder does not.
+
+        Args:
+            folder: Folder holding the files
+            names: Names of the files to read
+
+        Returns:
+            The files' contents, in the order of names
+        """
+        try:
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        except FileNotFoundError:
+            return [None] * len(names)
+        try:
+            prefix = folder + '/'
+            contents: List[Optional[str]] = []
+            for name in names:
+                path = prefix + name
+                lock_manager.acquire_read(path)
+                try:
+                    try:
+                        fd = os.open(name, os.O_RDONLY, dir_fd=dir_fd)
+                    except FileNotFoundError:
+                        contents.append(None)
+                        continue
+                    try:
+                        contents.append(FileSystem._read_fd(fd))
+                    finally:
+                        os.close(fd)
+                finally:
+                    lock_manager.release_read(path)
+            return contents
+        finally:
+            os.close(dir_fd)
+
+    @staticmethod
+    def _read_fd(fd: int) -> str:
+        """
+        Read and decode the whole content of an open file.
+        """
+        size = os.fstat(fd).st_size
+        if size >= MMAP_READ_THRESHOLD:
+            # Decode straight out of the mapping, without first
+            # copying the whole file into a bytes object
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, 'utf-8')
+        # Read into this thread's buffer and decode from it, so the only new
+        # object per read is the string; one spare byte notices a file that
+        # grew after the fstat
+        buffer = FileSystem._read_buffer(size + 1)
+        view = memoryview(buffer)
+        try:
+            length = 0
+            while True:
+                if length == len(buffer):
+                    grown = bytearray(2 * len(buffer))
+                    grown[:length] = view
+                    view.release()
+                    buffer = grown
+                    view = memoryview(buffer)
+                count = os.readv(fd, [view[length:]])
+                if not count:
+                    break
+                length += count
+            return str(view[:length], 'utf-8')
+        finally:
+            view.release()
+
+    @staticmethod
+    def _read_buffer(size: int) -> bytearray:
+        """
+        Get this thread's read buffer, replacing it with a larger one if it
+        holds fewer than size bytes. Buffers for files big enough to be
+        memory-mapped are not kept.
+        """
+        buffer = getattr(_read_buffers, 'buffer', None)
+        if buffer is None or len(buffer) < size:
+            buffer = bytearray(max(size, READ_BUFFER_SIZE))
+            if size <= MMAP_READ_THRESHOLD:
+                _read_buffers.buffer = buffer
+        return buffer
+
+    @staticmethod
+    @contextmanager
+    def interprocess_lock(path: str, shared: bool = False) -> Iterator[None]:
+        """
+        Hold a kernel lock (flock) on the file at path, creating it if needed,
+        for the duration of the with block. Unlike lock_manager's locks it
+        holds across processes and between separately opened handles, and the
+        kernel releases it if the holder dies.
+
+        Args:
+            path: Lock file; its content is never used
+            shared: Take a shared lock instead of an exclusive one
+        """
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the only handle on the lock releases it
+            os.close(fd)
+
+    @staticmethod
+    def append_file(path: str, content: bytes) -> int:
+        """
+        Append content to the file at the given path, creating the file if needed.
+        The parent directory must already exist.
+        Returns the offset in the file at which the content was written.
+        """
+        lock_manager.acquire_write(path)
+        try:
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+            except FileNotFoundError:
+                raise FileSystemError(f"Parent directory does not exist for path: {path}")
+            try:
+                FileSystem._write_all(fd, [content])
+                return os.lseek(fd, 0, os.SEEK_CUR) - len(content)
+            finally:
+                os.close(fd)
+        finally:
+            lock_manager.release_write(path)
+
+    @staticmethod
+    def read_range(path: str, offset: int, length: int) -> Optional[bytes]:
+        """
+        Read up to length bytes starting at offset from the file at the given path.
+        Returns None if the file does not exist.
         """
         lock_manager.acquire_read(path)
         try:
-            if not os.path.exists(path):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
                 return None
-            with open(path, 'r') as f:
-                return f.read()
+            try:
+                return FileSystem.read_range_fd(fd, offset, length)
+            finally:
+                os.close(fd)
         finally:
             lock_manager.release_read(path)
 
+    @staticmethod
+    def read_range_fd(fd: int, offset: int, length: int) -> bytes:
+        """
+        Read up to length bytes starting at offset from an open file,
+        for callers that keep the file open between reads.
+        """
+        chunks = []
+        while length > 0:
+            chunk = os.pread(fd, length, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+            length -= len(chunk)
+        return b''.join(chunks)
+
+    @staticmethod
+    def truncate_file(path: str, size: int, expected_size: Optional[int] = None) -> bool:
+        """
+        Cut the file at the given path down to size bytes.
+        If expected_size is given, the file is only cut while it is still
+        exactly that long, so data appended since it was checked is kept.
+        Returns whether the file was cut.
+        """
+        lock_manager.acquire_write(path)
+        try:
+            if expected_size is not None and os.stat(path).st_size != expected_size:
+                return False
+            os.truncate(path, size)
+            return True
+        finally:
+            lock_manager.release_write(path)
+
     @staticmethod
     def delete_file(path: str) -> None:
         """
         Delete the file at the given path.
+        A missing file is not an error; it is detected by the unlink itself.
         """
         lock_manager.acquire_write(path)
         try:
-            if os.path.exists(path):
-                os.remove(path)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
         finally:
             lock_manager.release_write(path)
 
@@ -66,7 +465,12 @@ class FileSystem:
     def create_folder(path: str) -> None:
         """
         Create a folder at the given path.
+        A folder that already exists is detected with a single stat and
+        without taking the lock, since storage handles are constructed far
+        more often than folders are created.
         """
+        if os.path.isdir(path):
+            return
         lock_manager.acquire_write(path)
         try:
             os.makedirs(path, exist_ok=True)
@@ -77,11 +481,13 @@ class FileSystem:
     def delete_folder(path: str) -> None:
         """
         Delete the folder at the given path and all its contents.
+        A missing folder is not an error.
         """
         lock_manager.acquire_write(path)
         try:
-            if os.path.exists(path):
-                shutil.rmtree(path)
+            shutil.rmtree(path)
+        except FileNotFoundError:
+            pass
         finally:
             lock_manager.release_write(path)
 
@@ -92,11 +498,41 @@ class FileSystem:
         """
         lock_manager.acquire_read(path)
         try:
-            if not os.path.exists(path):
-                return []
             if show_folder:
-                return os.listdir(path)
-            return [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+                try:
+                    return os.listdir(path)
+                except FileNotFoundError:
+                    return []
+            # scandir reports each entry's type from the directory listing
+            # itself, so files are told from folders without a stat per entry
+            try:
+                with os.scandir(path) as entries:
+                    return [entry.name for entry in entries if entry.is_file()]
+            except FileNotFoundError:
+                return []
+        finally:
+            lock_manager.release_read(path)
+
+    @staticmethod
+    def list_file_stems(path: str, suffix: str) -> List[str]:
+        """
+        List the names of the files in the folder at the given path that end
+        with suffix, with the suffix cut off, in a single pass over the
+        folder. The suffix is checked before the entry's type, so other
+        entries cost a string comparison only.
+        Returns an empty list if the folder does not exist.
+        """
+        cut = -len(suffix)
+        lock_manager.acquire_read(path)
+        try:
+            try:
+                with os.scandir(path) as entries:
+                    return [
+                        entry.name[:cut] for entry in entries
+                        if entry.name[cut:] == suffix and entry.is_file()
+                    ]
+            except FileNotFoundError:
+                return []
         finally:
             lock_manager.release_read(path)
 
@@ -3,8 +3,197 @@ from ..utils import sanitize_name
 from .file_system import FileSystem
 from ..env_config import config
 import os
-from typing import Optional
-from ..json_parser import JSONParser
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from copy import deepcopy
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from ..errors import NaturalDBError
+from ..json_parser import JSONParser, JSONParserError
+
+# Tables larger than this are read with a thread pool so per-file I/O overlaps
+PARALLEL_READ_THRESHOLD = 32
+MAX_READ_WORKERS = 16
+# Files read by one pool task; batching keeps per-task overhead off each file
+READ_BATCH_SIZE = 32
+# Records with more top-level fields than this are serialized and written incrementally
+STREAM_WRITE_THRESHOLD = 256
+# Record ID -> file path results kept per table handle
+RECORD_PATH_CACHE_SIZE = 4096
+# Parsed records kept by _record_cache for repeated lookups by ID
+RECORD_CACHE_SIZE = 1024
+# Log bytes appended since the last index checkpoint before a flush writes a new one
+INDEX_CHECKPOINT_INTERVAL = 1024 * 1024
+# A file or folder modified this recently may change again without its stamp
+# moving (inodes are reused and mtimes move in coarse ticks), so what was read
+# from it isn't cached
+MTIME_SETTLE_NS = 1_000_000_000
+
+class StorageError(NaturalDBError):
+    """Custom exception for Storage errors"""
+    def __init__(self, message: str):
+        super().__init__(message, type="StorageError")
+
+
+_read_pool: Optional[ThreadPoolExecutor] = None
+_read_pool_lock = threading.Lock()
+
+
+def _get_read_pool() -> ThreadPoolExecutor:
+    """
+    Get the thread pool shared by all bulk loads, starting it on first use.
+    Keeping one pool alive saves spawning and joining threads on every load.
+    """
+    global _read_pool
+    if _read_pool is None:
+        with _read_pool_lock:
+            if _read_pool is None:
+                _read_pool = ThreadPoolExecutor(max_workers=MAX_READ_WORKERS, thread_name_prefix="naturaldb-read")
+    return _read_pool
+
+
+def _parse_record(record_id: str, content: str) -> Any:
+    """
+    Parse a record's stored JSON, reporting a corrupt record by its ID.
+    The text is parsed once, with no separate validation pass.
+    """
+    try:
+        return JSONParser.parse_string(content)
+    except JSONParserError as e:
+        raise StorageError(f"Record {record_id} is not valid JSON: {e}") from e
+
+
+def _settled(stat: os.stat_result) -> bool:
+    """
+    Check whether a file was last modified more than MTIME_SETTLE_NS ago,
+    so that any later change to it is sure to move its stamp.
+    """
+    return time.time_ns() - stat.st_mtime_ns > MTIME_SETTLE_NS
+
+
+def _read_files(folder: str, names: List[str]) -> List[Optional[str]]:
+    """
+    Read a batch of files in one folder in order; None for files that no longer exist.
+    """
+    return FileSystem.read_files(folder, names)
+
+
+class _MetadataFile:
+    """
+    A metadata.json file whose parsed content is kept between reads.
+
+    The cache is a copy-on-write snapshot: a (stamp, metadata) tuple that
+    is replaced as a whole and never modified, so readers pick it up
+    without locking. It is reused while the file's inode, mtime and size
+    match the stamp. As with _RecordCache, only a file settled when read is
+    cached, since a recent stamp may not move when another handle rewrites
+    the file; recently written metadata is read again each time.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # (file identity stamp, parsed metadata); replaced, never modified
+        self._cache: Optional[Tuple[Tuple[int, int, int], dict]] = None
+
+    @staticmethod
+    def _stamp(stat: os.stat_result) -> Tuple[int, int, int]:
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def snapshot(self) -> Optional[dict]:
+        """
+        Get the current metadata as the shared snapshot, without copying.
+        Callers must not modify it. Returns None if the file does not exist.
+        """
+        try:
+            # Stat before reading: if the file changes in between, the stamp
+            # is stale and the next call simply parses again
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = self._stamp(stat)
+
+        cached = self._cache
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        content = FileSystem.read_file(self.path)
+        if content is None:
+            return None
+        value = JSONParser.parse_string(content)
+        if _settled(stat):
+            self._cache = (stamp, value)
+        return value
+
+    def load(self) -> Optional[dict]:
+        """
+        Load the metadata as a copy the caller is free to modify.
+        Returns None if the file does not exist.
+        """
+        value = self.snapshot()
+        return None if value is None else deepcopy(value)
+
+    def store(self, value: dict) -> None:
+        """
+        Write the metadata. The new file is too recent to cache, so the
+        next read parses it.
+        """
+        content = JSONParser.to_json_string(value, indent=2)
+        FileSystem.create_file(self.path, content, recursive=False)
+        self._cache = None
+
+
+class _RecordCache:
+    """
+    Parsed content of recently loaded record files, shared by all table
+    handles. An entry is used only while the file's inode, mtime and size
+    still match the stamp it was stored with. That stamp alone can't tell
+    two saves apart (a replaced file may get its inode back within one mtime
+    tick), so only files settled when read are cached, and saves through any
+    handle drop the entry. Cached values are never handed out, only copies
+    of them, which is much cheaper than parsing the file again.
+    The least recently used entry is dropped beyond RECORD_CACHE_SIZE entries.
+    """
+    def __init__(self) -> None:
+        self._entries: 'OrderedDict[str, Tuple[Tuple[int, int, int], Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stamp: Tuple[int, int, int]) -> Optional[Any]:
+        """
+        Get a copy of the data cached for path, or None if it isn't cached
+        under this stamp.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != stamp:
+                return None
+            self._entries.move_to_end(path)
+            data = entry[1]
+        return deepcopy(data)
+
+    def put(self, path: str, stamp: Tuple[int, int, int], data: Any) -> None:
+        """
+        Cache data parsed from the file at path with the given stamp.
+        The caller must not modify data afterwards.
+        """
+        with self._lock:
+            self._entries[path] = (stamp, data)
+            self._entries.move_to_end(path)
+            if len(self._entries) > RECORD_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def discard(self, path: str) -> None:
+        """
+        Drop any entry for path.
+        """
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+_record_cache = _RecordCache()
+
 
 class Storage:
     """
@@ -77,18 +266,19 @@ class DatabaseStorage:
         self.database = database
         self.base_path = Storage.get_path(user, database)
         FileSystem.create_folder(self.base_path)
+        self._metadata_file = _MetadataFile(f"{self.base_path}/metadata.json")
     
     @property
     def metadata(self) -> dict:
         """
         Load the database's metadata from a JSON file.
+        Parsed metadata is reused while the file is unchanged; see _MetadataFile.
         Uses FileSystem for thread-safe operations.
         """
-        metadata_path = f"{self.base_path}/metadata.json"
-        content = FileSystem.read_file(metadata_path)
-        if content is None:
+        value = self._metadata_file.load()
+        if value is None:
             return {'name': self.database.name, 'tables': []}
-        return JSONParser.parse_string(content)
+        return value
     
     @metadata.setter
     def metadata(self, value: dict) -> None:
@@ -96,9 +286,7 @@ class DatabaseStorage:
         Save the database's metadata to a JSON file.
         Uses FileSystem for thread-safe operations.
         """
-        metadata_path = f"{self.base_path}/metadata.json"
-        content = JSONParser.to_json_string(value, indent=2)
-        FileSystem.create_file(metadata_path, content, recursive=False)
+        self._metadata_file.store(value)
         
     def get_table_path(self, table: Table) -> str:
         """
@@ -129,6 +317,19 @@ class DatabaseStorage:
         path = self.get_table_path(table)
         FileSystem.create_folder(path)
         self.save_table_metadata(table)
+
+    def create_tables(self, tables: List[Table]) -> None:
+        """
+        Create directories and metadata for several tables, then make the
+        batch durable: each new table folder is synced for its metadata.json,
+        and the database folder once for the table folders themselves.
+        Uses FileSystem for thread-safe operations.
+        """
+        for table in tables:
+            self.create_table(table)
+        for table in tables:
+            FileSystem.sync_folder(self.get_table_path(table))
+        FileSystem.sync_folder(self.base_path)
     
     def delete_table(self, table: Table) -> None:
         """
@@ -142,7 +343,8 @@ class DatabaseStorage:
         """
         Get the number of tables in the database.
         """
-        return len(self.metadata.get('tables', []))
+        snapshot = self._metadata_file.snapshot()
+        return len(snapshot.get('tables', [])) if snapshot is not None else 0
 
 
 class TableStorage:
@@ -151,24 +353,72 @@ class TableStorage:
     Manages records within that table.
     
     """
+    # Layout of the record files this class reads and writes; tables without
+    # a layout.json use the flat layout
+    LAYOUT = 'flat'
+
     def __init__(self, user: User, database: Database, table: Table) -> None:
         self.user = user
         self.database = database
         self.table = table
         self.base_path = Storage.get_path(user, database, table)
+        # Prefix of every record path, built once for the per-record methods
+        self._base_prefix = self.base_path + '/'
+        # Record ID -> path, memoized per handle: a repeat lookup is a single
+        # cache hit instead of a sanitize, a name and two concatenations
+        self._record_path = lru_cache(maxsize=RECORD_PATH_CACHE_SIZE)(self._build_record_path)
         FileSystem.create_folder(self.base_path)
+        self._layout_path = f"{self.base_path}/layout.json"
+        self._check_layout()
+        self._metadata_file = _MetadataFile(f"{self.base_path}/metadata.json")
+
+    def _stored_layout(self) -> Optional[str]:
+        """
+        Get the layout recorded in the table's layout.json; None if it has none.
+        """
+        content = FileSystem.read_file(self._layout_path)
+        if content is None:
+            return None
+        return JSONParser.parse_string(content).get('layout')
+
+    def _check_layout(self) -> None:
+        """
+        Make sure the table's records are laid out the way this class reads them.
+        Tables from before layout.json are told apart by their files: a
+        records.log makes a log table, and flat record files a flat one. The
+        first handle of a layout other than flat to open a table records it.
+
+        Raises:
+            StorageError: If the table uses another layout
+        """
+        layout = self._stored_layout()
+        if layout is None:
+            if os.path.exists(self._base_prefix + 'records.log'):
+                layout = 'log'
+            elif self.LAYOUT == 'flat':
+                # Flat record files or none at all; flat either way
+                return
+            elif any(stem != 'metadata' for stem in FileSystem.list_file_stems(self.base_path, '.json')):
+                layout = 'flat'
+            else:
+                # No records yet; the table takes this class's layout
+                layout = self.LAYOUT
+            if layout == self.LAYOUT:
+                FileSystem.create_file(self._layout_path, JSONParser.to_json_string({'layout': self.LAYOUT, 'version': 1}, indent=2), recursive=False)
+        if layout != self.LAYOUT:
+            raise StorageError(f"Table {self.table.name} uses the {layout} layout, not {self.LAYOUT}")
 
     @property
     def metadata(self) -> dict:
         """
         Load the table's metadata from a JSON file.
+        Parsed metadata is reused while the file is unchanged; see _MetadataFile.
         Uses FileSystem for thread-safe operations.
         """
-        metadata_path = f"{self.base_path}/metadata.json"
-        content = FileSystem.read_file(metadata_path)
-        if content is None:
+        value = self._metadata_file.load()
+        if value is None:
             return {'name': self.table.name, 'indexes': {}}
-        return JSONParser.parse_string(content)
+        return value
         
     @metadata.setter
     def metadata(self, value: dict) -> None:
@@ -176,77 +426,708 @@ class TableStorage:
         Save the table's metadata to a JSON file.
         Uses FileSystem for thread-safe operations.
         """
-        metadata_path = f"{self.base_path}/metadata.json"
-        content = JSONParser.to_json_string(value, indent=2)
-        FileSystem.create_file(metadata_path, content, recursive=False)
+        self._metadata_file.store(value)
 
     
     def get_record_path(self, record: Record) -> str:
         """
         Get the file path for a given record.
+        Uses sanitize_name, like Storage.get_path and the lookups by record ID.
+        """
+        return self._record_path(record.id)
+
+    def _build_record_path(self, record_id: str) -> str:
+        """
+        Build the file path of a record from its unsanitized ID.
+        """
+        return self._base_prefix + self._record_name(sanitize_name(record_id))
+
+    def _record_name(self, record_id: str) -> str:
+        """
+        Get the path of a record's file relative to the table folder.
+
+        Args:
+            record_id: Record ID, already passed through sanitize_name
         """
-        return f"{self.base_path}/{record.id}.json"
+        return record_id + '.json'
     
     def save_record(self, record: Record) -> None:
         """
         Save a record to a JSON file.
+        Wide records (see STREAM_WRITE_THRESHOLD) are written field by field.
         Uses FileSystem for thread-safe operations.
         """
-        record_path = self.get_record_path(record)
-        content = JSONParser.to_json_string(record.data, indent=2)
-        FileSystem.create_file(record_path, content, recursive=False)
+        record_id = sanitize_name(record.id)
+        record_path = self._base_prefix + self._record_name(record_id)
+        if len(record.data) > STREAM_WRITE_THRESHOLD:
+            chunks = JSONParser.iter_json_string(record.data, indent=2)
+            FileSystem.stream_file(record_path, chunks, recursive=False)
+        else:
+            content = JSONParser.to_json_string(record.data, indent=2)
+            FileSystem.create_file(record_path, content, recursive=False)
+        _record_cache.discard(record_path)
     
-    def load_record(self, record_id: str) -> Record:
+    def clear_cache(self) -> None:
         """
-        Load a record from a JSON file.
+        Forget what this instance has cached about the table's records.
+        Call it before reusing the instance when other writers may have changed the table.
+        Flat tables answer from the folder itself, so there is nothing to forget here.
+        """
+
+    def save_records_batch(self, records: List[Record]) -> None:
+        """
+        Save several records, then sync the table folder once for the whole batch
+        instead of paying a flush per record.
+        The records are written back to back through one open handle on the
+        table folder; see FileSystem.create_files.
+        Uses FileSystem for thread-safe operations.
+        """
+        # Records are encoded together, so sub-objects they share are encoded once
+        encoded = iter(JSONParser.to_json_strings(
+            [record.data for record in records if len(record.data) <= STREAM_WRITE_THRESHOLD],
+            indent=2,
+        ))
+        files = []
+        for record in records:
+            if len(record.data) > STREAM_WRITE_THRESHOLD:
+                chunks = JSONParser.iter_json_string(record.data, indent=2)
+            else:
+                chunks = (next(encoded),)
+            files.append((self._record_name(sanitize_name(record.id)), chunks))
+        self._write_files(files)
+        prefix = self._base_prefix
+        for name, _ in files:
+            _record_cache.discard(prefix + name)
+
+    def _write_files(self, files: List[Tuple[str, Iterable[str]]]) -> None:
+        """
+        Write record files given by path relative to the table folder, then
+        sync the folder once.
+        """
+        FileSystem.create_files(self.base_path, files, sync=True)
+
+    def flush(self) -> None:
+        """
+        Make the records saved so far durable by syncing the table folder once.
+        save_record itself never syncs, so a run of saves pays for one flush.
+        """
+        FileSystem.sync_folder(self.base_path)
+
+    def record_exists(self, record_id: str) -> bool:
+        """
+        Check whether a record exists without reading or parsing it.
+        """
+        try:
+            os.stat(self._record_path(record_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def find_record(self, record_id: str) -> Optional[Record]:
+        """
+        Load a record by opening its JSON file directly.
+        A settled file loaded before and unchanged since is not parsed again; see _RecordCache.
+        Returns None if the record does not exist.
+        Raises StorageError if the record's file is not valid JSON.
+        Uses FileSystem for thread-safe operations.
+        """
+        record_path = self._record_path(record_id)
+        try:
+            # Stat before reading: if the file is replaced in between, the
+            # stamp is stale and the next lookup simply parses again
+            stat = os.stat(record_path)
+        except FileNotFoundError:
+            return None
+        stamp = _MetadataFile._stamp(stat)
+        data = _record_cache.get(record_path, stamp)
+        if data is None:
+            content = FileSystem.read_file(record_path)
+            if content is None:
+                return None
+            data = _parse_record(record_id, content)
+            if _settled(stat):
+                _record_cache.put(record_path, stamp, deepcopy(data))
+        return Record(id=record_id, data=data)
+
+    def read_record_content(self, record_id: str) -> Optional[str]:
+        """
+        Read a record's stored JSON text without parsing it.
+        Returns None if the record does not exist.
         Uses FileSystem for thread-safe operations.
         """
-        record_path = f"{self.base_path}/{sanitize_name(record_id)}.json"
-        content = FileSystem.read_file(record_path)
+        record_path = self._record_path(record_id)
+        return FileSystem.read_file(record_path)
+
+    def find_record_field(self, record_id: str, field_path: str) -> Any:
+        """
+        Read one field of a record, parsing only that field's value out of
+        the record's JSON; see JSONParser.parse_field.
+        Returns None if the record or the field does not exist.
+
+        Args:
+            record_id: ID of the record
+            field_path: Field path (e.g., 'specs.storage' or 'name')
+        """
+        content = self.read_record_content(record_id)
         if content is None:
+            return None
+        return JSONParser.parse_field(content, field_path)
+
+    def load_record(self, record_id: str, parse: bool = True) -> Union[Record, str]:
+        """
+        Load a record from a JSON file.
+        Raises FileNotFoundError if the record does not exist.
+
+        Args:
+            record_id: ID of the record
+            parse: If False, return the record's JSON text unparsed, for
+                   callers that only pass it on; use record_exists() to
+                   check for a record without reading it at all
+        """
+        if not parse:
+            content = self.read_record_content(record_id)
+            if content is None:
+                raise FileNotFoundError(f"Record {record_id} not found")
+            return content
+        record = self.find_record(record_id)
+        if record is None:
             raise FileNotFoundError(f"Record {record_id} not found")
-        data = JSONParser.parse_string(content)
-        return Record(id=record_id, data=data)
+        return record
     
     def load_all_records(self) -> dict:
         """
         Load all records in the table.
         Uses FileSystem for thread-safe operations.
+        Large tables are read in parallel; see PARALLEL_READ_THRESHOLD.
         """
-        records = {}
-        files = FileSystem.list_files(self.base_path, show_folder=False)
-        for filename in files:
-            if filename.endswith('.json') and filename != 'metadata.json':
-                record_id = filename[:-5]  # Remove .json extension
-                records[record_id] = self.load_record(record_id)
-        return records
+        record_ids = self.list_records()
+        folder = self.base_path
+        record_name = self._record_name
+        names = [record_name(record_id) for record_id in record_ids]
+        if len(names) > PARALLEL_READ_THRESHOLD:
+            # File reads release the GIL, so a pool overlaps the I/O;
+            # parsing stays on this thread where it is CPU-bound anyway.
+            # All batches are submitted up front, then consumed in order as
+            # they finish, so parsing one batch overlaps reading the next.
+            batches = [names[i:i + READ_BATCH_SIZE] for i in range(0, len(names), READ_BATCH_SIZE)]
+            contents = (
+                content
+                for batch in _get_read_pool().map(_read_files, repeat(folder), batches)
+                for content in batch
+            )
+        else:
+            contents = _read_files(folder, names)
+
+        # Records are built positionally with the parser bound locally, and the
+        # result dict in one comprehension, which keeps per-record overhead down
+        # on large tables. Files deleted between listing and reading are skipped.
+        parse = _parse_record
+        return {
+            record_id: Record(record_id, parse(record_id, content))
+            for record_id, content in zip(record_ids, contents)
+            if content is not None
+        }
 
     def delete_record(self, record_id: str) -> None:
         """
         Delete a record's JSON file.
         Uses FileSystem for thread-safe operations.
         """
-        record_path = f"{self.base_path}/{sanitize_name(record_id)}.json"
+        record_id = sanitize_name(record_id)
+        record_path = self._base_prefix + self._record_name(record_id)
         FileSystem.delete_file(record_path)
+        _record_cache.discard(record_path)
 
     def list_records(self) -> list:
         """
         List all record IDs in the table.
         Uses FileSystem for thread-safe operations.
         """
-        records = []
-        files = FileSystem.list_files(self.base_path, show_folder=False)
-        for filename in files:
-            if filename.endswith('.json') and filename != 'metadata.json':
-                records.append(filename[:-5])  # Remove .json extension
-        return records
-    
+        return self._scan_record_ids()
+
+    def _scan_record_ids(self) -> List[str]:
+        """
+        List the table folder for the IDs of its records.
+        """
+        record_ids = FileSystem.list_file_stems(self.base_path, '.json')
+        if 'metadata' in record_ids:
+            record_ids.remove('metadata')
+        return record_ids
+
     def __len__(self) -> int:
         """
         Get the number of records in the table.
         """
-        return len(self.list_records())
-    
+        return len(self._scan_record_ids())
+
+
+class ShardedTableStorage(TableStorage):
+    """
+    Table storage that spreads record files over 256 subfolders of the table
+    folder, named by two hex digits of a CRC-32 of the record ID, e.g.
+    'products/3f/laptop.json'. Each folder then holds a 256th of the table,
+    keeping file lookups fast on tables with millions of records.
+
+    Record IDs, listing and loading work as in TableStorage. The layout is
+    recorded in the table's layout.json when a sharded handle first opens
+    the table, and each handle checks it; see TableStorage._check_layout.
+    """
+    LAYOUT = 'sharded'
+
+    def __init__(self, user: User, database: Database, table: Table) -> None:
+        super().__init__(user, database, table)
+        # Shard folders this instance knows to exist
+        self._shards: set = set()
+
+    def _record_name(self, record_id: str) -> str:
+        """
+        Get the path of a record's file relative to the table folder,
+        inside its shard folder.
+        """
+        return f"{zlib.crc32(record_id.encode('utf-8')) & 0xff:02x}/{record_id}.json"
+
+    def _make_shard(self, shard: str) -> None:
+        """
+        Create a shard folder unless this instance already has.
+        """
+        if shard not in self._shards:
+            FileSystem.create_folder(self._base_prefix + shard)
+            self._shards.add(shard)
+
+    def save_record(self, record: Record) -> None:
+        """
+        Save a record to a JSON file in its shard folder.
+        """
+        self._make_shard(self._record_name(sanitize_name(record.id))[:2])
+        super().save_record(record)
+
+    def _write_files(self, files: List[Tuple[str, Iterable[str]]]) -> None:
+        """
+        Write record files through one open handle per shard folder, syncing
+        each touched shard folder once.
+        """
+        by_shard: Dict[str, List[Tuple[str, Iterable[str]]]] = {}
+        for name, chunks in files:
+            by_shard.setdefault(name[:2], []).append((name[3:], chunks))
+        for shard, shard_files in by_shard.items():
+            self._make_shard(shard)
+            FileSystem.create_files(self._base_prefix + shard, shard_files, sync=True)
+
+    def flush(self) -> None:
+        """
+        Make the records saved so far durable by syncing every shard folder,
+        and the table folder for the shard folders themselves.
+        """
+        for shard in self._shard_folders():
+            FileSystem.sync_folder(self._base_prefix + shard)
+        FileSystem.sync_folder(self.base_path)
+
+    def clear_cache(self) -> None:
+        """
+        Forget what this instance has cached about the table's records and shard folders.
+        """
+        super().clear_cache()
+        self._shards.clear()
+
+    def _shard_folders(self) -> List[str]:
+        """
+        List the shard folders of the table.
+        """
+        return [
+            name for name in FileSystem.list_files(self.base_path, show_folder=True)
+            if len(name) == 2 and os.path.isdir(self._base_prefix + name)
+        ]
+
+    def _scan_record_ids(self) -> List[str]:
+        """
+        List every shard folder for the IDs of the records in it.
+        """
+        return [
+            record_id
+            for shard in self._shard_folders()
+            for record_id in FileSystem.list_file_stems(self._base_prefix + shard, '.json')
+        ]
+
+
+class _OpenFile:
+    """
+    A read-only file descriptor closed when the last reference to it goes,
+    so a thread still reading through it never sees it closed under it.
+    """
+    __slots__ = ('fd',)
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+
+    def __del__(self) -> None:
+        os.close(self.fd)
+
+
+class LogTableStorage(TableStorage):
+    """
+    Table storage that appends records to a single log file, records.log,
+    instead of keeping one JSON file per record.
+
+    Each line of the log is '<record id>\t<compact JSON>'. A line with nothing
+    after the tab marks a deletion, and the last line for an ID wins. An
+    in-memory index maps every live record ID to the offset and length of its
+    latest JSON, so a load is a single positioned read and listing the table
+    needs no directory scan. The index picks up lines appended by other
+    instances before every read. Overwritten and deleted records keep their
+    old lines until compact() is called. Appends hold a shared flock on
+    records.lock and compaction an exclusive one, so compacting never drops
+    lines appended by other instances or processes.
+
+    The log is kept open between reads, so a lookup is a single pread; the
+    handle is dropped when the log is found replaced by a compaction.
+
+    The index is checkpointed to records.idx by checkpoint(), by compact(),
+    and by flush() once INDEX_CHECKPOINT_INTERVAL bytes have been appended
+    since the last checkpoint. Opening the table loads the checkpoint and
+    only scans the part of the log written after it.
+
+    An incomplete final line left by a crash is dropped when the log is opened.
+    The layout is recorded in layout.json like ShardedTableStorage's.
+    """
+    LAYOUT = 'log'
+
+    def __init__(self, user: User, database: Database, table: Table) -> None:
+        super().__init__(user, database, table)
+        self.log_path = f"{self.base_path}/records.log"
+        self.index_path = f"{self.base_path}/records.idx"
+        self.lock_path = f"{self.base_path}/records.lock"
+        # Record ID -> (offset, length) of its JSON in the log
+        self._index: Dict[str, Tuple[int, int]] = {}
+        # Bytes of the log covered by the index
+        self._indexed_size = 0
+        # Inode of the log file the index describes; compaction replaces the file
+        self._log_inode: Optional[int] = None
+        # Open handle on that log file, once something has been read from it
+        self._log_file: Optional[_OpenFile] = None
+        # Bytes of the log covered by the last checkpoint of the index
+        self._checkpointed_size = 0
+        self._index_lock = threading.Lock()
+        self._load_checkpoint()
+        self._refresh()
+        self._drop_torn_tail()
+
+    def _load_checkpoint(self) -> None:
+        """
+        Start the index from the checkpoint in records.idx, if it still
+        describes the current log. The checkpoint is ignored if the log has
+        since been replaced, shrunk, or doesn't end a line where it says.
+
+        The checkpoint's first line is '<log inode>\t<bytes covered>', and
+        every other line is '<record id>\t<offset>\t<length>'.
+        """
+        content = FileSystem.read_file(self.index_path)
+        if not content:
+            return
+        header, _, body = content.partition('\n')
+        try:
+            inode, covered = map(int, header.split('\t'))
+            stat = os.stat(self.log_path)
+        except (ValueError, FileNotFoundError):
+            return
+        if stat.st_ino != inode or not 0 < covered <= stat.st_size:
+            return
+        if FileSystem.read_range(self.log_path, covered - 1, 1) != b'\n':
+            return
+
+        index: Dict[str, Tuple[int, int]] = {}
+        for line in body.splitlines():
+            record_id, offset, length = line.split('\t')
+            index[record_id] = (int(offset), int(length))
+        with self._index_lock:
+            self._index = index
+            self._log_inode = inode
+            self._indexed_size = self._checkpointed_size = covered
+
+    def checkpoint(self) -> None:
+        """
+        Write the index to records.idx, so the next instance to open the
+        table doesn't have to scan the log up to this point.
+        """
+        self._refresh()
+        with self._index_lock:
+            # The inode the index was built from, not a fresh stat: the log
+            # may have been compacted into a new file since _refresh
+            inode = self._log_inode
+            if inode is None:
+                return
+            lines = [f"{inode}\t{self._indexed_size}\n"]
+            lines.extend(
+                f"{record_id}\t{offset}\t{length}\n"
+                for record_id, (offset, length) in self._index.items()
+            )
+            FileSystem.stream_file(self.index_path, lines)
+            self._checkpointed_size = self._indexed_size
+
+    def _drop_torn_tail(self) -> None:
+        """
+        Cut off a final line left incomplete by a crash, so the next append
+        starts on a line of its own. Appends always write whole lines, so
+        unindexed bytes without a newline can only be such a leftover.
+        """
+        size = self._log_size()
+        if size <= self._indexed_size:
+            return
+        tail = FileSystem.read_range(self.log_path, self._indexed_size, size - self._indexed_size)
+        if tail and b'\n' not in tail:
+            FileSystem.truncate_file(self.log_path, self._indexed_size, expected_size=size)
+
+    def _log_size(self) -> int:
+        """
+        Get the current size of the log in bytes; 0 if it doesn't exist yet.
+        """
+        try:
+            return os.stat(self.log_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _refresh(self) -> None:
+        """
+        Index the complete lines appended to the log since it was last indexed.
+        """
+        with self._index_lock:
+            try:
+                stat = os.stat(self.log_path)
+                size, inode = stat.st_size, stat.st_ino
+            except FileNotFoundError:
+                size, inode = 0, None
+            if inode != self._log_inode or size < self._indexed_size:
+                # Compacted or removed by another instance; index it from scratch
+                self._index.clear()
+                self._indexed_size = 0
+                self._log_inode = inode
+                self._log_file = None
+            if size > self._indexed_size:
+                tail = self._read_log(self._open_log(), self._indexed_size, size - self._indexed_size)
+                self._index_lines(tail or b'')
+
+    def _open_log(self) -> Optional[_OpenFile]:
+        """
+        Get the open handle on the log file the index describes, opening it
+        if needed. Returns None if that file is gone or has been replaced.
+        Must be called with _index_lock held.
+        """
+        if self._log_file is None and self._log_inode is not None:
+            try:
+                fd = os.open(self.log_path, os.O_RDONLY)
+            except FileNotFoundError:
+                return None
+            log_file = _OpenFile(fd)
+            if os.fstat(fd).st_ino != self._log_inode:
+                return None
+            self._log_file = log_file
+        return self._log_file
+
+    def _read_log(self, log_file: Optional[_OpenFile], offset: int, length: int) -> Optional[bytes]:
+        """
+        Read a range of the log through log_file, or by path if there is no handle.
+        """
+        if log_file is None:
+            return FileSystem.read_range(self.log_path, offset, length)
+        return FileSystem.read_range_fd(log_file.fd, offset, length)
+
+    def _scan_lines(self, data: bytes, base: int, index: Dict[str, Tuple[int, int]]) -> int:
+        """
+        Apply the complete lines in data, which sits at offset base of the log, to index.
+
+        Returns:
+            Number of bytes of data taken up by complete lines
+
+        Raises:
+            StorageError: If a line has no tab between record ID and JSON
+        """
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end == -1:
+                return start
+            tab = data.find(b'\t', start, end)
+            if tab == -1:
+                raise StorageError(f"Damaged line in {self.log_path} at offset {base + start}")
+            record_id = data[start:tab].decode('utf-8')
+            if end > tab + 1:
+                index[record_id] = (base + tab + 1, end - tab - 1)
+            else:
+                index.pop(record_id, None)
+            start = end + 1
+
+    def _index_lines(self, data: bytes) -> None:
+        """
+        Index the complete lines in data, which starts where the index ends.
+        Must be called with _index_lock held.
+        """
+        self._indexed_size += self._scan_lines(data, self._indexed_size, self._index)
+
+    def _append(self, lines: List[Tuple[str, int, bytes]]) -> None:
+        """
+        Append complete log lines in one write and bring the index up to date
+        with them. Each line comes as (record ID, length of its encoded ID,
+        line), so its JSON is located from the lengths, without scanning the
+        written bytes again.
+        """
+        data = b''.join(line for _, _, line in lines)
+        with self._index_lock, FileSystem.interprocess_lock(self.lock_path, shared=True):
+            offset = FileSystem.append_file(self.log_path, data)
+            if offset == self._indexed_size:
+                index = self._index
+                for record_id, id_length, line in lines:
+                    # The JSON sits between the tab after the ID and the newline
+                    length = len(line) - id_length - 2
+                    if length:
+                        index[record_id] = (offset + id_length + 1, length)
+                    else:
+                        index.pop(record_id, None)
+                    offset += len(line)
+                self._indexed_size = offset
+                if self._log_inode is None:
+                    # This append created the log. The shared flock keeps it
+                    # from being compacted away before it is stat'ed here.
+                    self._log_inode = os.stat(self.log_path).st_ino
+                return
+        # Another instance appended first; index its lines and ours in file order
+        self._refresh()
+
+    @staticmethod
+    def _encode(record_id: str, content: str) -> Tuple[str, int, bytes]:
+        """
+        Encode one log line for a record, as passed to _append; empty content
+        marks the record deleted.
+        """
+        record_id = sanitize_name(record_id)
+        encoded_id = record_id.encode('utf-8')
+        return record_id, len(encoded_id), b'%s\t%s\n' % (encoded_id, content.encode('utf-8'))
+
+    def save_record(self, record: Record) -> None:
+        """
+        Save a record by appending it to the log.
+        """
+        self._append([self._encode(record.id, JSONParser.to_json_string(record.data))])
+
+    def save_records_batch(self, records: List[Record]) -> None:
+        """
+        Save several records with a single append, then sync the log once.
+        """
+        if not records:
+            return
+        contents = JSONParser.to_json_strings([record.data for record in records])
+        self._append([self._encode(record.id, content) for record, content in zip(records, contents)])
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Make the records appended so far durable by syncing the log once,
+        checkpointing the index if enough has been appended since the last one.
+        """
+        try:
+            FileSystem.sync_file(self.log_path)
+        except FileNotFoundError:
+            return
+        if self._indexed_size - self._checkpointed_size >= INDEX_CHECKPOINT_INTERVAL:
+            self.checkpoint()
+
+    def clear_cache(self) -> None:
+        """
+        Pick up records other instances have appended to the log.
+        """
+        self._refresh()
+
+    def record_exists(self, record_id: str) -> bool:
+        """
+        Check whether a record exists, from the index.
+        """
+        self._refresh()
+        return sanitize_name(record_id) in self._index
+
+    def find_record(self, record_id: str) -> Optional[Record]:
+        """
+        Load a record with one read of its latest line in the log.
+        Returns None if the record does not exist.
+        """
+        content = self.read_record_content(record_id)
+        if content is None:
+            return None
+        return Record(id=record_id, data=_parse_record(record_id, content))
+
+    def read_record_content(self, record_id: str) -> Optional[str]:
+        """
+        Read a record's JSON text with one read of its latest line in the log.
+        Returns None if the record does not exist.
+        """
+        self._refresh()
+        with self._index_lock:
+            entry = self._index.get(sanitize_name(record_id))
+            if entry is None:
+                return None
+            log_file = self._open_log()
+        content = self._read_log(log_file, *entry)
+        if not content:
+            return None
+        return content.decode('utf-8')
+
+    def load_all_records(self) -> dict:
+        """
+        Load all records in the table with a single read of the log.
+        """
+        self._refresh()
+        with self._index_lock:
+            entries = list(self._index.items())
+            indexed_size = self._indexed_size
+            log_file = self._open_log()
+        log = self._read_log(log_file, 0, indexed_size) or b''
+        parse = _parse_record
+        records = {}
+        for record_id, (offset, length) in entries:
+            content = log[offset:offset + length]
+            if len(content) == length:
+                records[record_id] = Record(record_id, parse(record_id, content.decode('utf-8')))
+        return records
+
+    def delete_record(self, record_id: str) -> None:
+        """
+        Delete a record by appending a deletion marker to the log.
+        """
+        self._append([self._encode(record_id, '')])
+
+    def list_records(self) -> list:
+        """
+        List all record IDs in the table, from the index.
+        """
+        self._refresh()
+        return list(self._index)
+
+    def __len__(self) -> int:
+        """
+        Get the number of records in the table, from the index.
+        """
+        self._refresh()
+        return len(self._index)
+
+    def compact(self) -> None:
+        """
+        Rewrite the log with only the latest line of each live record,
+        dropping overwritten records and deletion markers.
+        Lines are copied as they are, without parsing them. Appends by other
+        instances wait until the compacted log is in place.
+        """
+        with self._index_lock, FileSystem.interprocess_lock(self.lock_path):
+            log = FileSystem.read_range(self.log_path, 0, self._log_size()) or b''
+            live: Dict[str, Tuple[int, int]] = {}
+            self._scan_lines(log, 0, live)
+            content = b''.join(
+                record_id.encode('utf-8') + b'\t' + log[offset:offset + length] + b'\n'
+                for record_id, (offset, length) in live.items()
+            )
+            FileSystem.create_file(self.log_path, content.decode('utf-8'), recursive=False)
+            self._index.clear()
+            self._indexed_size = 0
+            self._log_inode = None
+            self._log_file = None
+        self.checkpoint()
+
 
 if __name__ == "__main__":
     # Example usage
@@ -1,10 +1,24 @@
 from .lock import lock_manager
+from functools import lru_cache
 import os
 
+# ASCII characters sanitize_name drops, as a str.translate deletion table
+_DROP_ASCII = str.maketrans('', '', ''.join(
+    chr(code) for code in range(128)
+    if not (chr(code).isalnum() or chr(code) in ' _-')
+))
+
+@lru_cache(maxsize=4096)
 def sanitize_name(name: str) -> str:
     """
     Sanitize a name to be filesystem-friendly.
+    Results are cached, since the same user, database, table and record
+    names are sanitized again on every storage call.
     """
+    if name.isascii():
+        # One C-level pass; the per-character check is only needed for
+        # non-ASCII names, where isalnum covers letters of every script
+        return name.translate(_DROP_ASCII).rstrip()
     return "".join(c for c in name if c.isalnum() or c in (' ', '_', '-')).rstrip()
 
 def xss_sanitize(input_str: str) -> str:
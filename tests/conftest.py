@@ -0,0 +1,30 @@
+"""
+Shared fixtures for the NaturalDB test suite
+"""
+
+import pytest
+import os
+import shutil
+import tempfile
+
+
+@pytest.fixture(scope="session")
+def session_data_dir():
+    """
+    Create a data directory shared by the whole session (in memory when /dev/shm exists).
+    Per-test directories are created inside it and removed along with it in
+    one pass at the end, rather than one by one in each test's teardown.
+    Each pytest-xdist worker gets a directory of its own.
+    Nothing written here needs to survive a crash, so fsync is turned off
+    for the session; the directory is thrown away at the end anyway.
+    """
+    base_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    temp_dir = tempfile.mkdtemp(prefix="naturaldb-test-", dir=base_dir)
+    durability = os.environ.get("NATURALDB_DURABILITY")
+    os.environ["NATURALDB_DURABILITY"] = "none"
+    yield temp_dir
+    if durability is None:
+        os.environ.pop("NATURALDB_DURABILITY", None)
+    else:
+        os.environ["NATURALDB_DURABILITY"] = durability
+    shutil.rmtree(temp_dir, ignore_errors=True)
@@ -4,20 +4,18 @@ Converted from demo_chainable_api.py
 """
 
 import pytest
-import os
 import tempfile
-import shutil
 from naturaldb.entities import User, Database, Record
 from naturaldb.query_engine.query_engine import QueryEngine
 
 
 @pytest.fixture
-def temp_data_dir():
+def temp_data_dir(session_data_dir, monkeypatch):
     """Create a temporary directory for test data"""
-    temp_dir = tempfile.mkdtemp()
-    os.environ['NATURALDB_DATA_PATH'] = temp_dir
-    yield temp_dir
-    shutil.rmtree(temp_dir)
+    temp_dir = tempfile.mkdtemp(dir=session_data_dir)
+    monkeypatch.setenv('NATURALDB_DATA_PATH', temp_dir)
+    # Left for session_data_dir's removal, so teardown doesn't wait on it
+    return temp_dir
 
 
 @pytest.fixture
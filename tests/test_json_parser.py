@@ -85,6 +85,11 @@ class TestJSONParserEscapeSequences:
         assert JSONParser.parse_string(r'"form\ffeed"') == "form\ffeed"
         assert JSONParser.parse_string(r'"back\bspace"') == "back\bspace"
 
+    def test_parse_escape_after_plain_text(self):
+        """Test that a string is decoded in full when an escape follows plain text"""
+        result = JSONParser.parse_string(r'{"quote": "say \"hi\" now", "plain": "done"}')
+        assert result == {"quote": 'say "hi" now', "plain": "done"}
+
     def test_parse_unicode_escape(self):
         """Test parsing unicode escape sequences"""
         assert JSONParser.parse_string(r'"\u0041"') == "A"
@@ -212,6 +217,12 @@ class TestJSONParserObjects:
         assert result["users"][1]["tags"] == ["user"]
         assert result["metadata"]["count"] == 2
 
+    def test_object_keys_are_shared(self):
+        """Test that equal keys parsed from different objects are the same string"""
+        first = JSONParser.parse_string('{"user_name": "Alice"}')
+        second = JSONParser.parse_string('{"user_name": "Bob"}')
+        assert next(iter(first)) is next(iter(second))
+
 
 class TestJSONParserWhitespace:
     """Test handling of whitespace"""
@@ -265,6 +276,13 @@ class TestJSONParserErrors:
         with pytest.raises(JSONParserError):
             JSONParser.parse_string("123.456.789")
 
+    def test_parse_incomplete_numbers(self):
+        """Test that numbers cut off after a sign, point or exponent raise errors"""
+        for text in ["-", "1.", "1e", "1e+", "1.5e", "[-a]", "01"]:
+            with pytest.raises(JSONParserError):
+                JSONParser.parse_string(text)
+        assert JSONParser.parse_string("[-0, 1E2, 2.5e-1]") == [0, 100.0, 0.25]
+
     def test_parse_trailing_comma_array(self):
         """Test parsing array with trailing comma"""
         with pytest.raises(JSONParserError):
@@ -286,6 +304,30 @@ class TestJSONParserErrors:
             JSONParser.parse_string(r'"invalid\x escape"')
 
 
+class TestJSONParserFieldLookup:
+    """Test parsing a single field out of a JSON object"""
+
+    def test_parse_field_skips_other_values(self):
+        """Test that a nested field is found past values holding brackets and quotes"""
+        data = {
+            "a": {"b": [1, {"x": "]}"}], "c": {"d": "q\\\"}", "e": {"f": 3.5}}},
+            "t": [{"k": "["}],
+        }
+        for indent in (None, 2):
+            json_str = JSONParser.to_json_string(data, indent)
+            assert JSONParser.parse_field(json_str, "a.c.e.f") == 3.5
+            assert JSONParser.parse_field(json_str, "a.c.d") == "q\\\"}"
+            assert JSONParser.parse_field(json_str, "t") == [{"k": "["}]
+            assert JSONParser.parse_field(json_str, "a.missing") is None
+            assert JSONParser.parse_field(json_str, "a.b.x") is None
+
+    def test_parse_field_unterminated(self):
+        """Test that unterminated values skipped on the way raise errors"""
+        for json_str in ['{"a": "x', '{"a": [1, "x]', '{"a": [1']:
+            with pytest.raises(JSONParserError):
+                JSONParser.parse_field(json_str, "b")
+
+
 class TestJSONStringBuilder:
     """Test JSON string generation"""
 
@@ -298,6 +340,13 @@ class TestJSONStringBuilder:
         assert JSONParser.to_json_string(True) == "true"
         assert JSONParser.to_json_string(False) == "false"
 
+    def test_to_json_strings_with_shared_objects(self):
+        """Test that objects sharing sub-objects convert as they would one by one"""
+        shared = {"cpu": "i7", "ram": [16, 32]}
+        objs = [{"id": i, "specs": shared, "nested": {"specs": shared}} for i in range(3)] + [[shared, shared]]
+        for indent in (None, 2):
+            assert JSONParser.to_json_strings(objs, indent) == [JSONParser.to_json_string(obj, indent) for obj in objs]
+
     def test_to_json_number(self):
         """Test converting numbers to JSON"""
         assert JSONParser.to_json_string(42) == "42"
@@ -314,6 +363,7 @@ class TestJSONStringBuilder:
         assert JSONParser.to_json_string('say "hello"') == r'"say \"hello\""'
         assert JSONParser.to_json_string("line1\nline2") == r'"line1\nline2"'
         assert JSONParser.to_json_string("tab\there") == r'"tab\there"'
+        assert JSONParser.to_json_string("back\\slash\x01") == r'"back\\slash\u0001"'
 
     def test_to_json_array(self):
         """Test converting arrays to JSON"""
@@ -348,6 +398,14 @@ class TestJSONStringBuilder:
         parsed = JSONParser.parse_string(result)
         assert parsed["users"][0]["name"] == "Alice"
 
+    def test_iter_json_string_matches_to_json_string(self):
+        """Test that chunked output joins to the same string as to_json_string"""
+        samples = [{}, [], 42, {"a": 1, "b": [1, {"c": None}]}, [1, [2, 3], {"d": "x"}]]
+        for obj in samples:
+            for indent in (None, 2):
+                chunks = list(JSONParser.iter_json_string(obj, indent=indent))
+                assert "".join(chunks) == JSONParser.to_json_string(obj, indent=indent)
+
 
 class TestJSONParserFileOperations:
     """Test file parsing operations"""
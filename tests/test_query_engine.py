@@ -5,6 +5,7 @@ Tests QueryEngine, QueryOperations, and JoinOperations
 
 import pytest
 import os
+import json
 import tempfile
 import shutil
 import sys
@@ -14,15 +15,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from naturaldb.entities import User, Database, Table, Record
 from naturaldb.query_engine.query_engine import QueryEngine
 from naturaldb.query_engine.operations import QueryOperations, JoinOperations
+from naturaldb.query_engine.columnar import ColumnarTable
 from naturaldb.storage_system.storage import Storage, DatabaseStorage
 
 
 @pytest.fixture
-def temp_data_dir():
+def temp_data_dir(session_data_dir):
     """Create a temporary directory for test data"""
-    temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    shutil.rmtree(temp_dir)
+    temp_dir = tempfile.mkdtemp(dir=session_data_dir)
+    # Left for session_data_dir's removal, so teardown doesn't wait on it
+    return temp_dir
 
 
 @pytest.fixture
@@ -92,9 +94,8 @@ class TestQueryEngineBasicOperations:
         
         # Verify record content
         with open(record_path, 'r') as f:
-            content = f.read()
-            assert '"name"' in content or '"Alice"' in content, "Record should contain inserted data"
-            assert '"age"' in content or '30' in content, "Record should contain age field"
+            parsed = json.loads(f.read())
+        assert parsed == {"name": "Alice", "age": 30}, "Record should contain inserted data"
 
     def test_insert_creates_table_if_not_exists(self, query_engine, temp_data_dir):
         """Test that insert creates table if it doesn't exist"""
@@ -151,18 +152,13 @@ class TestQueryEngineBasicOperations:
             Record(id="3", data={"name": "Charlie"})
         ]
         
-        for record in records_to_insert:
-            query_engine.insert("users", record)
+        assert query_engine.insert_many("users", records_to_insert) is True
         
-        # Verify all files exist in filesystem
+        # Verify the table directory holds exactly the metadata and the 3 record files
         table_path = os.path.join(temp_data_dir, "test_user", "test_db", "users")
-        for record_id in ["1", "2", "3"]:
-            record_path = os.path.join(table_path, f"{record_id}.json")
-            assert os.path.exists(record_path), f"Record {record_id}.json should exist"
-        
-        # Verify correct number of JSON files (excluding metadata.json)
-        json_files = [f for f in os.listdir(table_path) if f.endswith('.json') and f != 'metadata.json']
-        assert len(json_files) == 3, f"Should have 3 record files, found {len(json_files)}"
+        with os.scandir(table_path) as entries:
+            files = {entry.name for entry in entries}
+        assert files == {"metadata.json", "1.json", "2.json", "3.json"}, f"Unexpected table files: {files}"
         
         all_records = query_engine.find_all("users")
         assert len(all_records) == 3
@@ -179,8 +175,7 @@ class TestQueryEngineBasicOperations:
         record_path = os.path.join(temp_data_dir, "test_user", "test_db", "users", "1.json")
         assert os.path.exists(record_path)
         with open(record_path, 'r') as f:
-            initial_content = f.read()
-            assert '30' in initial_content
+            assert json.loads(f.read())["age"] == 30
         
         # Update record
         updated_record = Record(id="1", data={"name": "Alice", "age": 31})
@@ -190,9 +185,8 @@ class TestQueryEngineBasicOperations:
         # Verify file was updated
         assert os.path.exists(record_path), "Record file should still exist"
         with open(record_path, 'r') as f:
-            updated_content = f.read()
-            assert '31' in updated_content, "File should contain updated age"
-            assert '30' not in updated_content or updated_content.count('30') == 0, "Old age should be replaced"
+            parsed = json.loads(f.read())
+        assert parsed == {"name": "Alice", "age": 31}, "File should contain only the updated data"
         
         # Verify through query engine
         found = query_engine.find_by_id("users", "1")
@@ -240,90 +234,113 @@ class TestQueryEngineBasicOperations:
         result = query_engine.delete("nonexistent_table", "1")
         assert result is False
 
+    def test_table_storage_handle_reused(self, query_engine, test_user, test_database, temp_data_dir):
+        """Test that table handles are cached but follow changes made elsewhere"""
+        query_engine.insert("users", Record(id="1", data={"name": "Alice"}))
+        handle = query_engine.get_table_storage("users")
+        assert query_engine.get_table_storage("users") is handle
+
+        # Another engine deletes the record; this one must not update it back into existence
+        assert QueryEngine(test_user, test_database).delete("users", "1") is True
+        assert query_engine.update("users", Record(id="1", data={"name": "Bob"})) is False
+
+        shutil.rmtree(os.path.join(temp_data_dir, "test_user", "test_db", "users"))
+        assert query_engine.get_table_storage("users") is None
+        assert query_engine.insert("users", Record(id="2", data={"name": "Carol"})) is True
+        assert query_engine.get_table_storage("users") is not handle
+
 
 class TestQueryEngineFiltering:
     """Test filtering operations"""
 
-    def setup_method(self):
-        """Set up test data for filtering tests"""
-        self.test_records = [
-            Record(id="1", data={"name": "Alice", "age": 30, "city": "New York"}),
-            Record(id="2", data={"name": "Bob", "age": 25, "city": "Los Angeles"}),
-            Record(id="3", data={"name": "Charlie", "age": 35, "city": "New York"}),
-            Record(id="4", data={"name": "Diana", "age": 28, "city": "Chicago"}),
-            Record(id="5", data={"name": "Eve", "age": 30, "city": "Boston"})
-        ]
+    test_records = (
+        Record(id="1", data={"name": "Alice", "age": 30, "city": "New York"}),
+        Record(id="2", data={"name": "Bob", "age": 25, "city": "Los Angeles"}),
+        Record(id="3", data={"name": "Charlie", "age": 35, "city": "New York"}),
+        Record(id="4", data={"name": "Diana", "age": 28, "city": "Chicago"}),
+        Record(id="5", data={"name": "Eve", "age": 30, "city": "Boston"})
+    )
+
+    @pytest.fixture(scope="class")
+    @classmethod
+    def shared_engine(cls, session_data_dir):
+        """Create a QueryEngine with a read-only users table shared by the whole class"""
+        temp_dir = tempfile.mkdtemp(dir=session_data_dir)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv('NATURALDB_DATA_PATH', temp_dir)
+            engine = QueryEngine(User(id="test_user", name="Test User"), Database(name="test_db"))
+            for record in cls.test_records:
+                engine.insert("users", record)
+
+            table_path = os.path.join(temp_dir, "test_user", "test_db", "users")
+            # Blocks writes for non-root users only; populated_engine checks the contents either way
+            os.chmod(table_path, 0o555)
+            try:
+                yield engine
+            finally:
+                os.chmod(table_path, 0o755)
+        shutil.rmtree(temp_dir)
 
-    def test_filter_equality(self, query_engine):
+    @pytest.fixture
+    def populated_engine(self, shared_engine):
+        """Hand out the shared engine, failing the test that changes its users table"""
+        yield shared_engine
+        records = shared_engine.get_table_storage("users").load_all_records()
+        assert {record_id: record.data for record_id, record in records.items()} == {
+            record.id: record.data for record in self.test_records
+        }, "test changed the shared users table"
+
+    def test_filter_equality(self, populated_engine):
         """Test filtering with equality operator"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "age", 30, "eq")
+        results = populated_engine.filter("users", "age", 30, "eq")
         assert len(results) == 2
         names = {r.data["name"] for r in results}
         assert names == {"Alice", "Eve"}
 
-    def test_filter_not_equal(self, query_engine):
+    def test_filter_not_equal(self, populated_engine):
         """Test filtering with not equal operator"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "city", "New York", "ne")
+        results = populated_engine.filter("users", "city", "New York", "ne")
         assert len(results) == 3
 
-    def test_filter_greater_than(self, query_engine):
+    def test_filter_greater_than(self, populated_engine):
         """Test filtering with greater than operator"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "age", 30, "gt")
+        results = populated_engine.filter("users", "age", 30, "gt")
         assert len(results) == 1
         assert results[0].data["name"] == "Charlie"
 
-    def test_filter_greater_than_or_equal(self, query_engine):
+    def test_filter_greater_than_or_equal(self, populated_engine):
         """Test filtering with greater than or equal operator"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "age", 30, "gte")
+        results = populated_engine.filter("users", "age", 30, "gte")
         assert len(results) == 3
 
-    def test_filter_less_than(self, query_engine):
+    def test_filter_less_than(self, populated_engine):
         """Test filtering with less than operator"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "age", 30, "lt")
+        results = populated_engine.filter("users", "age", 30, "lt")
         assert len(results) == 2
 
-    def test_filter_less_than_or_equal(self, query_engine):
+    def test_filter_less_than_or_equal(self, populated_engine):
         """Test filtering with less than or equal operator"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "age", 30, "lte")
+        results = populated_engine.filter("users", "age", 30, "lte")
         assert len(results) == 4
 
-    def test_filter_contains(self, query_engine):
+    def test_filter_contains(self, populated_engine):
         """Test filtering with contains operator"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "name", "li", "contains")
+        results = populated_engine.filter("users", "name", "li", "contains")
         assert len(results) == 2  # Alice and Charlie
 
-    def test_filter_nonexistent_table(self, query_engine):
+    def test_filter_contains_non_string_field(self, populated_engine):
+        """Test contains matches against the string form of non-string values"""
+        results = populated_engine.filter("users", "age", "3", "contains")
+        assert {r.data["name"] for r in results} == {"Alice", "Charlie", "Eve"}
+
+    def test_filter_nonexistent_table(self, populated_engine):
         """Test filtering on non-existent table"""
-        results = query_engine.filter("nonexistent", "field", "value")
+        results = populated_engine.filter("nonexistent", "field", "value")
         assert results == []
 
-    def test_filter_no_matches(self, query_engine):
+    def test_filter_no_matches(self, populated_engine):
         """Test filtering with no matches"""
-        for record in self.test_records:
-            query_engine.insert("users", record)
-        
-        results = query_engine.filter("users", "age", 100, "eq")
+        results = populated_engine.filter("users", "age", 100, "eq")
         assert results == []
 
 
@@ -435,6 +452,28 @@ class TestQueryEngineGrouping:
         groups = query_engine.group_by("nonexistent", "field")
         assert groups == {}
 
+    def test_reuse_loaded_records(self, query_engine):
+        """Test chaining operations over records loaded once"""
+        query_engine.insert_many("users", [
+            Record(id="1", data={"name": "Alice", "city": "NYC", "age": 30}),
+            Record(id="2", data={"name": "Bob", "city": "LA", "age": 25}),
+            Record(id="3", data={"name": "Charlie", "city": "NYC", "age": 35})
+        ])
+        records = query_engine.find_all("users")
+
+        adults = query_engine.filter("users", "age", 28, "gt", records=records)
+        assert {r.id for r in adults} == {"1", "3"}
+
+        groups = query_engine.group_by("users", "city", records=adults)
+        assert list(groups) == ["NYC"]
+        assert len(groups["NYC"]) == 2
+
+        ordered = query_engine.order_by("users", "age", ascending=False, records=adults)
+        assert [r.id for r in ordered] == ["3", "1"]
+
+        names = query_engine.project("users", ["name"], records=ordered)
+        assert names == [{"name": "Charlie"}, {"name": "Alice"}]
+
 
 class TestQueryEngineOrdering:
     """Test ordering operations"""
@@ -608,16 +647,13 @@ class TestJoinOperations:
         storage = Storage()
         storage.create_database(test_user, test_database)
         
-        # Create users table
+        # Create users and orders tables
         users_table = Table(name="users", indexes={})
-        users_ops = QueryOperations(test_user, test_database, users_table)
-        db_storage = DatabaseStorage(test_user, test_database)
-        db_storage.create_table(users_table)
-        
-        # Create orders table
         orders_table = Table(name="orders", indexes={})
+        users_ops = QueryOperations(test_user, test_database, users_table)
         orders_ops = QueryOperations(test_user, test_database, orders_table)
-        db_storage.create_table(orders_table)
+        db_storage = DatabaseStorage(test_user, test_database)
+        db_storage.create_tables([users_table, orders_table])
         
         # Insert test data
         users_data = [
@@ -906,13 +942,14 @@ class TestQueryEngineRenameOperations:
         results = query_engine.rename("nonexistent", {"field": "alias"})
         assert results == []
     
-    @pytest.mark.skip(reason="select() doesn't support aliases parameter")
     def test_select_empty_table(self, query_engine, temp_data_dir):
         """Test SELECT on empty table"""
-        query_engine.create_table("users")
+        query_engine.create_table(Table(name="users", indexes={}))
         
         results = query_engine.select("users", aliases={"user_id": "id"})
         assert results == []
+        assert query_engine.select("users", fields=["user_id"], aliases={"user_id": "id"}) == []
+        assert query_engine.rename("users", {"user_id": "id"}, {"age": {"operator": "gt", "value": 1}}) == []
     
     @pytest.mark.skip(reason="rename() method not implemented in QueryEngine")
     def test_rename_partial_fields(self, query_engine, temp_data_dir):
@@ -939,6 +976,179 @@ class TestQueryEngineRenameOperations:
         assert results[0]["name"] == "Alice"
 
 
+class TestColumnarQueries:
+    """Test select/rename over the columnar table copy"""
+
+    seed_records = [
+        Record(id="1", data={"user_id": 101, "user_name": "Alice", "age": 30,
+                             "profile": {"contact": {"email": "alice@example.com"}}}),
+        Record(id="2", data={"user_id": 102, "user_name": "Bob"})
+    ]
+
+    @pytest.fixture(scope="class")
+    @classmethod
+    def seeded_data_dir(cls, session_data_dir):
+        """Insert the users table once; each test works on its own copy"""
+        seed_dir = tempfile.mkdtemp(dir=session_data_dir)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv('NATURALDB_DATA_PATH', seed_dir)
+            engine = QueryEngine(User(id="test_user", name="Test User"), Database(name="test_db"))
+            engine.insert_many("users", cls.seed_records)
+        yield seed_dir
+        shutil.rmtree(seed_dir)
+
+    @pytest.fixture
+    def users_engine(self, seeded_data_dir, query_engine, temp_data_dir):
+        shutil.copytree(seeded_data_dir, temp_data_dir, dirs_exist_ok=True)
+        return query_engine
+
+    def test_columnar_table_pads_missing_fields(self):
+        """Test that rows missing a field get None in that column"""
+        table = ColumnarTable.from_records([
+            Record(id="1", data={"a": 1}),
+            Record(id="2", data={"b": 2}),
+            Record(id="3", data={"a": 3, "b": 4})
+        ])
+        assert table.row_count == 3
+        assert table.column("a") == [1, None, 3]
+        assert table.column("b") == [None, 2, 4]
+        assert table.rename({"a": "x"}).head(2).to_rows() == [
+            {"x": 1, "b": None}, {"x": None, "b": 2}
+        ]
+
+    def test_columnar_table_extend(self):
+        """Test bulk appends keep materialized columns and new fields aligned"""
+        table = ColumnarTable.from_records([Record(id="1", data={"a": 1})])
+        assert table.column("a") == [1]
+
+        table.extend([{"a": 2, "b": [2]}, {"b": [3]}])
+        assert table.row_count == 3
+        assert table.column("a") == [1, 2, None]
+        assert table.column("b") == [None, [2], [3]]
+        rows = table.to_rows()
+        rows[1]["b"].append(0)
+        assert table.column("b")[1] == [2]
+
+    def test_select_fields(self, users_engine):
+        """Test selecting top-level fields"""
+        results = users_engine.select("users", fields="user_name,age")
+        assert sorted(results, key=lambda r: r["user_name"]) == [
+            {"user_name": "Alice", "age": 30},
+            {"user_name": "Bob", "age": None}
+        ]
+        assert len(users_engine.select("users", fields="user_name", limit=1)) == 1
+
+    def test_rename_nested_field(self, users_engine):
+        """Test renaming a nested field without conditions"""
+        results = users_engine.rename("users", {"user_id": "id", "profile.contact.email": "email"})
+        assert sorted(results, key=lambda r: r["id"]) == [
+            {"id": 101, "email": "alice@example.com"},
+            {"id": 102, "email": None}
+        ]
+
+    def test_select_and_rename_with_conditions(self, users_engine):
+        """Test WHERE/conditions dicts combining several operators"""
+        users_engine.insert("users", Record(id="3", data={"user_id": 103, "user_name": "Carol", "age": 41}))
+
+        results = users_engine.select(
+            "users",
+            fields="user_name",
+            where={"user_id": {"operator": "in", "value": [101, 103]}, "age": {"operator": "gte", "value": 35}},
+        )
+        assert results == [{"user_name": "Carol"}]
+
+        results = users_engine.rename(
+            "users",
+            {"user_name": "name"},
+            conditions={"profile.contact.email": {"operator": "contains", "value": "@"}, "user_id": 101},
+        )
+        assert results == [{"name": "Alice"}]
+
+    def test_select_with_aliases(self, users_engine):
+        """Test SELECT ... AS with and without a WHERE clause"""
+        aliases = {"user_id": "id", "user_name": "name"}
+        results = users_engine.select("users", fields=["user_id", "user_name"], aliases=aliases)
+        assert sorted(results, key=lambda r: r["id"]) == [
+            {"id": 101, "name": "Alice"},
+            {"id": 102, "name": "Bob"}
+        ]
+
+        results = users_engine.select(
+            "users", fields="user_id,profile.contact.email", aliases=aliases, where={"user_id": 101}
+        )
+        assert results == [{"id": 101, "profile.contact.email": "alice@example.com"}]
+
+        results = users_engine.select("users", aliases=aliases, where={"user_id": 102})
+        assert results == [{"id": 102, "name": "Bob"}]
+
+    def test_shared_prefix_paths(self, query_engine):
+        """Test reading several nested paths that share prefixes"""
+        query_engine.insert_many("people", [
+            Record(id="1", data={"profile": {"name": "Alice", "contact": {"email": "a@x.com", "phone": "1"}}}),
+            Record(id="2", data={"profile": {"name": "Bob", "contact": "none"}}),
+            Record(id="3", data={"profile": None})
+        ])
+        mapping = {"profile.contact.email": "email", "profile.name": "name", "profile.contact.phone": "phone"}
+        expected = [
+            {"email": "a@x.com", "name": "Alice", "phone": "1"},
+            {"email": None, "name": "Bob", "phone": None},
+            {"email": None, "name": None, "phone": None}
+        ]
+
+        results = query_engine.rename("people", mapping)
+        assert sorted(results, key=lambda r: str(r["name"])) == sorted(expected, key=lambda r: str(r["name"]))
+
+        project_row = QueryOperations._compile_projector(tuple(mapping.items()))
+        for record in query_engine.find_all("people"):
+            assert project_row(record.data) == {
+                alias: QueryOperations._get_nested_field(record.data, path) for path, alias in mapping.items()
+            }
+
+    def test_column_mask_matches_row_predicate(self):
+        """Test that whole-column condition evaluation agrees with the per-row tests"""
+        values = [1, 2, 3, "3", None, [1], {"a": 1}, "abc"]
+        cases = [
+            ("eq", 3), ("ne", 3), ("in", [1, "3", None]), ("in", 2), ("nin", [1, "abc"]),
+            ("nin", 2), ("contains", "1"), ("contains", "b"), ("unknown", 1)
+        ]
+        for operator, value in cases:
+            expected = [bool(QueryEngine._compile_value_test(value, operator)(v)) for v in values]
+            assert [bool(m) for m in QueryEngine._column_mask(values, value, operator)] == expected
+
+    def test_guarding_condition_evaluated_before_comparison(self, users_engine):
+        """Test that a condition ahead of a comparison still filters records the comparison can't handle"""
+        # Bob has no age; comparing his None > 0 would raise
+        for guard in ({"operator": "ne", "value": "Bob"}, {"operator": "contains", "value": "Ali"}):
+            results = users_engine.select(
+                "users",
+                fields="user_name",
+                where={"user_name": guard, "age": {"operator": "gt", "value": 0}},
+            )
+            assert results == [{"user_name": "Alice"}]
+
+    def test_columnar_copy_reused_until_table_changes(self, users_engine, temp_data_dir):
+        """Test that the cached columnar copy is reused and refreshed on writes"""
+        table_path = os.path.join(temp_data_dir, "test_user", "test_db", "users")
+        # Backdate the folder so its mtime is settled
+        os.utime(table_path, ns=(0, 0))
+
+        first = users_engine.select("users", fields="profile")
+        table = users_engine._load_columnar("users")
+        assert table is users_engine._load_columnar("users")
+        # Only the selected field was turned into a column
+        assert set(table.columns) == {"profile"}
+
+        # Results don't share nested values with the cached copy
+        for row in first:
+            if row["profile"] is not None:
+                row["profile"]["contact"] = None
+        emails = users_engine.rename("users", {"profile.contact.email": "email"})
+        assert {r["email"] for r in emails} == {"alice@example.com", None}
+
+        users_engine.insert("users", Record(id="3", data={"user_id": 103, "user_name": "Carol"}))
+        assert len(users_engine.select("users", fields="user_name")) == 3
+
+
 class TestBasicCRUDOperations:
     """Test basic CRUD operations (from demo)"""
     
@@ -1157,6 +1367,23 @@ class TestNestedDataOperations:
         projected = query_engine.project("Products", ["name", "specs.color"])
         assert len(projected) == 1
 
+    def test_filter_by_nested_field(self, query_engine):
+        """Test filtering by a nested field path, including records missing the path"""
+        products = [
+            Record(id="1", data={"name": "iPhone", "specs": {"color": "Blue"}}),
+            Record(id="2", data={"name": "iPad", "specs": {"color": "Silver"}}),
+            Record(id="3", data={"name": "Cable", "specs": "n/a"}),
+            Record(id="4", data={"name": "Case"}),
+        ]
+        for product in products:
+            query_engine.insert("Products", product)
+
+        results = query_engine.filter("Products", "specs.color", "Blue")
+        assert [r.data["name"] for r in results] == ["iPhone"]
+
+        missing = query_engine.filter("Products", "specs.color", None)
+        assert {r.data["name"] for r in missing} == {"Cable", "Case"}
+
 
 class TestTableOperations:
     """Test table-level operations"""
@@ -6,7 +6,6 @@ Tests the Storage, DatabaseStorage, and TableStorage classes with thread safety
 import pytest
 import os
 import json
-import shutil
 import tempfile
 import threading
 import time
@@ -17,19 +16,21 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from naturaldb.entities import User, Database, Table, Record
-from naturaldb.storage_system.storage import Storage, DatabaseStorage, TableStorage
+from naturaldb.storage_system.storage import Storage, DatabaseStorage, TableStorage, LogTableStorage, ShardedTableStorage, StorageError, _record_cache
 from naturaldb.storage_system.file_system import FileSystem
+from naturaldb.lock import LockManager, LOCK_STRIPES
+from naturaldb.json_parser import JSONParser
 
 
 @pytest.fixture
-def temp_data_dir(monkeypatch):
+def temp_data_dir(monkeypatch, session_data_dir):
     """Create a temporary data directory for testing"""
-    temp_dir = tempfile.mkdtemp()
+    temp_dir = tempfile.mkdtemp(dir=session_data_dir)
     original_cwd = os.getcwd()
     monkeypatch.chdir(temp_dir)
     yield temp_dir
     monkeypatch.chdir(original_cwd)
-    shutil.rmtree(temp_dir, ignore_errors=True)
+    # Left for session_data_dir's removal, so teardown doesn't wait on it
 
 
 @pytest.fixture
@@ -215,6 +216,38 @@ class TestDatabaseStorage:
         retrieved = db_storage.metadata
         assert retrieved == new_metadata
 
+    def test_metadata_cached_until_file_changes(self, temp_data_dir, sample_user, sample_database):
+        """Test that cached metadata is copied out and dropped when the file is rewritten"""
+        db_storage = DatabaseStorage(sample_user, sample_database)
+        db_storage.metadata = {'name': 'test_db', 'tables': ['table1']}
+
+        db_storage.metadata['tables'].append('not_saved')
+        assert db_storage.metadata['tables'] == ['table1']
+
+        other = DatabaseStorage(sample_user, sample_database)
+        other.metadata = {'name': 'test_db', 'tables': ['table1', 'table2']}
+        assert db_storage.metadata['tables'] == ['table1', 'table2']
+
+    def test_metadata_reused_only_once_settled(self, temp_data_dir, sample_user, sample_database, monkeypatch):
+        """Test that recently written metadata is read again and settled metadata is not"""
+        db_storage = DatabaseStorage(sample_user, sample_database)
+        db_storage.metadata = {'name': 'test_db', 'tables': ['table1']}
+        metadata_path = os.path.join(db_storage.base_path, "metadata.json")
+        read_file = FileSystem.read_file
+        reads = []
+        monkeypatch.setattr(FileSystem, "read_file", lambda path: reads.append(path) or read_file(path))
+
+        assert db_storage.metadata == {'name': 'test_db', 'tables': ['table1']}
+        assert len(db_storage) == 1
+        assert reads == [metadata_path, metadata_path]
+
+        # Backdate the file so its stamp is settled
+        os.utime(metadata_path, ns=(0, 0))
+        reads.clear()
+        assert db_storage.metadata == {'name': 'test_db', 'tables': ['table1']}
+        assert len(db_storage) == 1
+        assert reads == [metadata_path]
+
     def test_get_table_path(self, temp_data_dir, sample_user, sample_database, sample_table):
         """Test getting table path"""
         db_storage = DatabaseStorage(sample_user, sample_database)
@@ -235,6 +268,39 @@ class TestDatabaseStorage:
         metadata_path = db_storage.get_table_metadata_path(sample_table)
         assert os.path.exists(metadata_path)
 
+    def test_create_tables(self, temp_data_dir, monkeypatch, sample_user, sample_database):
+        """Test creating several tables in one batch, each with its metadata, syncing the folders once"""
+        db_storage = DatabaseStorage(sample_user, sample_database)
+        tables = [Table(name="users", indexes={}), Table(name="orders", indexes={}, keys=["order_id"])]
+        # Run the real syncs, counting them
+        monkeypatch.setenv("NATURALDB_DURABILITY", "sync")
+        fsync = os.fsync
+        synced = []
+        monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or fsync(fd))
+
+        db_storage.create_tables(tables)
+
+        for table in tables:
+            assert os.path.isdir(db_storage.get_table_path(table))
+            with open(db_storage.get_table_metadata_path(table)) as f:
+                assert json.load(f) == {"name": table.name, "keys": table.keys}
+        # One sync per new table folder, and one for the database folder
+        assert len(synced) == len(tables) + 1
+
+    def test_create_table_is_a_one_table_call_without_sync(self, temp_data_dir, monkeypatch, sample_user, sample_database):
+        """Test that create_table creates the folder and metadata like create_tables, but syncs nothing"""
+        db_storage = DatabaseStorage(sample_user, sample_database)
+        table = Table(name="single", indexes={})
+        synced = []
+        monkeypatch.setattr(FileSystem, "sync_folder", synced.append)
+
+        db_storage.create_table(table)
+
+        assert os.path.isdir(db_storage.get_table_path(table))
+        with open(db_storage.get_table_metadata_path(table)) as f:
+            assert json.load(f) == {"name": "single", "keys": None}
+        assert synced == []
+
     def test_save_table_metadata(self, temp_data_dir, sample_user, sample_database):
         """Test saving table metadata"""
         db_storage = DatabaseStorage(sample_user, sample_database)
@@ -315,6 +381,15 @@ class TestTableStorage:
         expected = os.path.join(table_storage.base_path, f"{sample_record.id}.json")
         assert record_path == expected
 
+    def test_get_record_path_sanitizes_id(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test that a record is saved under the same sanitized ID it is loaded by"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        record = Record(id="../rec/ord", data={"test": "value"})
+
+        assert table_storage.get_record_path(record) == os.path.join(table_storage.base_path, "record.json")
+        table_storage.save_record(record)
+        assert table_storage.load_record("../rec/ord").data == {"test": "value"}
+
     def test_save_record(self, temp_data_dir, sample_user, sample_database, sample_table, sample_record):
         """Test saving a record"""
         table_storage = TableStorage(sample_user, sample_database, sample_table)
@@ -341,6 +416,36 @@ class TestTableStorage:
         loaded = table_storage.load_record("test")
         assert loaded.data["value"] == 2
 
+    def test_save_record_leaves_no_temp_files(self, temp_data_dir, sample_user, sample_database, sample_table, sample_record):
+        """Test that the atomic write cleans up after renaming into place"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_record(sample_record)
+        table_storage.save_record(sample_record)
+
+        assert os.listdir(table_storage.base_path) == ["record1.json"]
+
+    def test_failed_save_leaves_no_temp_files(self, temp_data_dir, sample_user, sample_database, sample_table, monkeypatch):
+        """Test that a write that fails part way removes its temporary file"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+
+        def failing_writev(fd, buffers):
+            raise OSError("disk full")
+        monkeypatch.setattr(os, "writev", failing_writev)
+
+        with pytest.raises(OSError):
+            table_storage.save_record(Record(id="broken", data={"a": 1}))
+        assert not [name for name in os.listdir(table_storage.base_path) if name.startswith("broken")]
+
+    def test_save_records_batch(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test saving several records in one batch"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        records = [Record(id=str(i), data={"index": i}) for i in range(5)]
+
+        table_storage.save_records_batch(records)
+
+        assert sorted(table_storage.list_records()) == ["0", "1", "2", "3", "4"]
+        assert table_storage.load_record("3").data == {"index": 3}
+
     def test_load_record(self, temp_data_dir, sample_user, sample_database, sample_table, sample_record):
         """Test loading a record"""
         table_storage = TableStorage(sample_user, sample_database, sample_table)
@@ -357,6 +462,103 @@ class TestTableStorage:
         with pytest.raises(FileNotFoundError):
             table_storage.load_record("nonexistent")
 
+    def test_repeat_loads_reuse_parsed_record(self, temp_data_dir, monkeypatch, sample_user, sample_database, sample_table):
+        """Test that an unchanged, settled record file is parsed once and copies are handed out"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_record(Record(id="a", data={"tags": ["x"]}))
+        # Backdate the file so its stamp is settled
+        os.utime(table_storage.get_record_path(Record(id="a", data={})), ns=(0, 0))
+        first = table_storage.load_record("a")
+        first.data["tags"].append("changed")
+
+        parse = JSONParser.parse_string
+        monkeypatch.setattr(JSONParser, "parse_string", lambda content: pytest.fail("record parsed again"))
+        assert table_storage.load_record("a").data == {"tags": ["x"]}
+
+        monkeypatch.setattr(JSONParser, "parse_string", parse)
+        table_storage.save_record(Record(id="a", data={"tags": ["y"]}))
+        assert table_storage.load_record("a").data == {"tags": ["y"]}
+        table_storage.delete_record("a")
+        assert table_storage.find_record("a") is None
+
+    def test_record_cache_never_serves_an_older_save(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test that recently written records aren't cached and saves drop cached entries"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        path = table_storage.get_record_path(Record(id="a", data={}))
+        table_storage.save_record(Record(id="a", data={"value": 111}))
+        table_storage.load_record("a")
+        assert path not in _record_cache._entries
+
+        os.utime(path, ns=(0, 0))
+        table_storage.load_record("a")
+        assert path in _record_cache._entries
+
+        # Even if a new file got the old stamp back, the entry is gone
+        table_storage.save_record(Record(id="a", data={"value": 222}))
+        assert path not in _record_cache._entries
+        os.utime(path, ns=(0, 0))
+        table_storage.load_record("a")
+        table_storage.save_records_batch([Record(id="a", data={"value": 333})])
+        assert path not in _record_cache._entries
+        assert table_storage.load_record("a").data == {"value": 333}
+
+    def test_corrupt_record(self, temp_data_dir, monkeypatch, sample_user, sample_database, sample_table):
+        """Test that existence checks never read a record and corrupt records are reported by ID"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_record(Record(id="bad", data={}))
+        with open(table_storage.get_record_path(Record(id="bad", data={})), "w") as f:
+            f.write('{"name": ')
+
+        read_file = FileSystem.read_file
+        monkeypatch.setattr(FileSystem, "read_file", lambda path: pytest.fail("record read"))
+        assert table_storage.record_exists("bad")
+
+        monkeypatch.setattr(FileSystem, "read_file", read_file)
+        with pytest.raises(StorageError, match="bad"):
+            table_storage.load_record("bad")
+        with pytest.raises(StorageError, match="bad"):
+            table_storage.load_all_records()
+
+    def test_find_record_field(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test reading a single nested field of a record"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_record(Record(id="laptop", data={"name": "Laptop", "specs": {"display": {"size": 15}}}))
+
+        assert table_storage.find_record_field("laptop", "specs.display.size") == 15
+        assert table_storage.find_record_field("laptop", "specs.weight") is None
+        assert table_storage.find_record_field("missing", "name") is None
+
+    def test_load_record_unparsed(self, temp_data_dir, sample_user, sample_database, sample_table, sample_record):
+        """Test loading a record's JSON text without parsing it"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_record(sample_record)
+
+        content = table_storage.load_record("record1", parse=False)
+        assert json.loads(content) == sample_record.data
+        with pytest.raises(FileNotFoundError):
+            table_storage.load_record("missing", parse=False)
+
+    def test_find_record(self, temp_data_dir, sample_user, sample_database, sample_table, sample_record):
+        """Test find_record returns the record, or None when it doesn't exist"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_record(sample_record)
+
+        found = table_storage.find_record(sample_record.id)
+        assert found.data == sample_record.data
+        assert table_storage.find_record("nonexistent") is None
+        assert table_storage.find_record("../etc/passwd") is None
+
+    def test_record_exists(self, temp_data_dir, sample_user, sample_database, sample_table, sample_record):
+        """Test record_exists tracks saves and deletes"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        assert not table_storage.record_exists(sample_record.id)
+
+        table_storage.save_record(sample_record)
+        assert table_storage.record_exists(sample_record.id)
+
+        table_storage.delete_record(sample_record.id)
+        assert not table_storage.record_exists(sample_record.id)
+
     def test_load_record_sanitizes_id(self, temp_data_dir, sample_user, sample_database, sample_table):
         """Test that load_record sanitizes the record ID"""
         table_storage = TableStorage(sample_user, sample_database, sample_table)
@@ -404,6 +606,17 @@ class TestTableStorage:
         assert len(all_records) == 1
         assert "metadata" not in all_records
 
+    def test_load_all_records_large_table(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test loading a table large enough to use parallel reads"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+
+        for i in range(50):
+            table_storage.save_record(Record(id=str(i), data={"index": i}))
+
+        all_records = table_storage.load_all_records()
+        assert len(all_records) == 50
+        assert all(all_records[str(i)].data["index"] == i for i in range(50))
+
     def test_delete_record(self, temp_data_dir, sample_user, sample_database, sample_table, sample_record):
         """Test deleting a record"""
         table_storage = TableStorage(sample_user, sample_database, sample_table)
@@ -425,15 +638,27 @@ class TestTableStorage:
         table_storage = TableStorage(sample_user, sample_database, sample_table)
         
         # Save multiple records
-        for i in range(5):
-            record = Record(id=str(i), data={"index": i})
-            table_storage.save_record(record)
+        table_storage.save_records_batch([Record(id=str(i), data={"index": i}) for i in range(5)])
         
         record_ids = table_storage.list_records()
         assert len(record_ids) == 5
         for i in range(5):
             assert str(i) in record_ids
 
+    def test_other_handles_writes_seen_without_clear_cache(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test that listing, counting and existence checks see another handle's saves and deletes"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_records_batch([Record(id="a", data={}), Record(id="b", data={})])
+        assert sorted(table_storage.list_records()) == ["a", "b"]
+        assert table_storage.record_exists("a") and not table_storage.record_exists("c")
+
+        other = TableStorage(sample_user, sample_database, sample_table)
+        other.delete_record("a")
+        other.save_record(Record(id="c", data={}))
+        assert sorted(table_storage.list_records()) == ["b", "c"]
+        assert len(table_storage) == 2
+        assert table_storage.record_exists("c") and not table_storage.record_exists("a")
+
     def test_list_records_empty(self, temp_data_dir, sample_user, sample_database, sample_table):
         """Test listing records when table is empty"""
         table_storage = TableStorage(sample_user, sample_database, sample_table)
@@ -446,16 +671,280 @@ class TestTableStorage:
         assert len(table_storage) == 0
         
         # Add records
-        for i in range(3):
-            record = Record(id=str(i), data={"index": i})
-            table_storage.save_record(record)
+        table_storage.save_records_batch([Record(id=str(i), data={"index": i}) for i in range(3)])
         
         assert len(table_storage) == 3
 
 
+class TestShardedTableStorage:
+    """Test cases for the sharded table storage"""
+
+    def test_records_spread_over_shards(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test that records are saved in shard folders and read back through them"""
+        table_storage = ShardedTableStorage(sample_user, sample_database, sample_table)
+        table_storage.save_record(Record(id="single", data={"value": 0}))
+        table_storage.save_records_batch([Record(id=f"r{i}", data={"value": i}) for i in range(50)])
+        table_storage.flush()
+
+        shards = [name for name in os.listdir(table_storage.base_path) if os.path.isdir(os.path.join(table_storage.base_path, name))]
+        assert len(shards) > 1 and all(len(name) == 2 for name in shards)
+        assert not any(name.endswith(".json") and name not in ("metadata.json", "layout.json") for name in os.listdir(table_storage.base_path))
+
+        path = table_storage.get_record_path(Record(id="r7", data={}))
+        assert os.path.basename(os.path.dirname(path)) in shards
+        assert table_storage.load_record("r7").data == {"value": 7}
+
+        reopened = ShardedTableStorage(sample_user, sample_database, sample_table)
+        assert len(reopened) == 51
+        assert reopened.load_all_records()["single"].data == {"value": 0}
+        reopened.delete_record("r7")
+        assert not reopened.record_exists("r7")
+        assert len(reopened) == 50
+
+    def test_layout_recorded_and_checked(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test that a sharded table records its layout and a flat table with records isn't claimed"""
+        sharded = ShardedTableStorage(sample_user, sample_database, sample_table)
+        sharded.save_record(Record(id="a", data={"value": 1}))
+        with open(os.path.join(sharded.base_path, "layout.json")) as f:
+            assert JSONParser.parse_string(f.read())["layout"] == "sharded"
+        assert ShardedTableStorage(sample_user, sample_database, sample_table).load_record("a").data == {"value": 1}
+
+        flat_table = Table(name="flat_table", indexes={})
+        flat = TableStorage(sample_user, sample_database, flat_table)
+        flat.save_record(Record(id="b", data={"value": 2}))
+        with pytest.raises(StorageError, match="flat layout"):
+            ShardedTableStorage(sample_user, sample_database, flat_table)
+        assert not os.path.exists(os.path.join(flat.base_path, "layout.json"))
+        assert TableStorage(sample_user, sample_database, flat_table).load_record("b").data == {"value": 2}
+
+    def test_each_layout_refused_by_the_other_classes(self, temp_data_dir, sample_user, sample_database):
+        """Test that a table of each layout can't be opened with either of the other two classes"""
+        classes = {"flat": TableStorage, "sharded": ShardedTableStorage, "log": LogTableStorage}
+        for layout, storage_class in classes.items():
+            table = Table(name=f"{layout}_table", indexes={})
+            storage_class(sample_user, sample_database, table).save_record(Record(id="a", data={"value": 1}))
+            for other_layout, other_class in classes.items():
+                if other_layout != layout:
+                    with pytest.raises(StorageError, match=f"uses the {layout} layout, not {other_layout}"):
+                        other_class(sample_user, sample_database, table)
+            assert storage_class(sample_user, sample_database, table).load_record("a").data == {"value": 1}
+
+    def test_log_table_from_before_layout_file(self, temp_data_dir, sample_user, sample_database):
+        """Test that a log table without layout.json is recognized by its log and then recorded"""
+        table = Table(name="old_log", indexes={})
+        log_storage = LogTableStorage(sample_user, sample_database, table)
+        log_storage.save_record(Record(id="a", data={"value": 1}))
+        os.remove(os.path.join(log_storage.base_path, "layout.json"))
+
+        for other_class in (TableStorage, ShardedTableStorage):
+            with pytest.raises(StorageError, match="uses the log layout"):
+                other_class(sample_user, sample_database, table)
+        assert not os.path.exists(os.path.join(log_storage.base_path, "layout.json"))
+        assert LogTableStorage(sample_user, sample_database, table).load_record("a").data == {"value": 1}
+        assert os.path.exists(os.path.join(log_storage.base_path, "layout.json"))
+
+
+class TestLogTableStorage:
+    """Test cases for the append-log table storage"""
+
+    @pytest.fixture
+    def log_storage(self, temp_data_dir, monkeypatch, sample_user, sample_database, sample_table):
+        """Create a LogTableStorage rooted in the temporary directory"""
+        monkeypatch.setenv('NATURALDB_DATA_PATH', temp_data_dir)
+        return LogTableStorage(sample_user, sample_database, sample_table)
+
+    def test_save_and_load(self, log_storage, sample_record):
+        """Test that records round-trip through the log and the latest line wins"""
+        log_storage.save_record(sample_record)
+        log_storage.save_record(Record(id="record1", data={"name": "Updated", "note": "tab\there\nnext"}))
+        log_storage.save_records_batch([Record(id=str(i), data={"index": i}) for i in range(3)])
+
+        assert log_storage.load_record("record1").data == {"name": "Updated", "note": "tab\there\nnext"}
+        assert sorted(log_storage.list_records()) == ["0", "1", "2", "record1"]
+        assert log_storage.load_all_records()["2"].data == {"index": 2}
+        assert not os.path.exists(log_storage.get_record_path(sample_record))
+
+    def test_batch_index_matches_log(self, log_storage, sample_user, sample_database, sample_table):
+        """Test that the index built while appending a batch matches one built by scanning the log"""
+        log_storage.save_records_batch([
+            Record(id="a", data={"name": "ä"}),
+            Record(id="ü", data={"value": 1}),
+            Record(id="a", data={"name": "second"}),
+        ])
+        log_storage.delete_record("ü")
+
+        reopened = LogTableStorage(sample_user, sample_database, sample_table)
+        assert reopened._index == log_storage._index
+        assert log_storage.load_all_records()["a"].data == {"name": "second"}
+
+    def test_first_append_keeps_index(self, log_storage, monkeypatch):
+        """Test that the append creating the log doesn't make the next read rescan it"""
+        log_storage.save_record(Record(id="a", data={"value": 1}))
+        assert log_storage._log_inode == os.stat(log_storage.log_path).st_ino
+
+        monkeypatch.setattr(log_storage, "_index_lines", lambda data: pytest.fail("log scanned again"))
+        assert log_storage.load_record("a").data == {"value": 1}
+
+    def test_delete_record(self, log_storage, sample_record):
+        """Test that a deleted record is gone from the index"""
+        log_storage.save_record(sample_record)
+        log_storage.delete_record("record1")
+
+        assert not log_storage.record_exists("record1")
+        assert log_storage.find_record("record1") is None
+        assert len(log_storage) == 0
+
+    def test_reopen_and_shared_log(self, log_storage, sample_user, sample_database, sample_table):
+        """Test that a new instance indexes the existing log and instances see each other's writes"""
+        first = log_storage
+        first.save_record(Record(id="a", data={"value": 1}))
+        second = LogTableStorage(sample_user, sample_database, sample_table)
+        assert second.load_record("a").data == {"value": 1}
+
+        second.save_record(Record(id="b", data={"value": 2}))
+        first.save_record(Record(id="a", data={"value": 3}))
+        assert second.load_record("a").data == {"value": 3}
+        assert sorted(first.list_records()) == ["a", "b"]
+
+    def test_torn_tail_dropped_on_open(self, log_storage, sample_user, sample_database, sample_table):
+        """Test that an incomplete last line is cut off before new appends"""
+        log_storage.save_record(Record(id="a", data={"value": 1}))
+        with open(log_storage.log_path, "ab") as f:
+            f.write(b'b\t{"val')
+
+        reopened = LogTableStorage(sample_user, sample_database, sample_table)
+        reopened.save_record(Record(id="c", data={"value": 3}))
+        assert reopened.load_all_records().keys() == {"a", "c"}
+
+    def test_corrupt_record_in_bulk_load(self, log_storage):
+        """Test that a corrupt record found by a bulk load is reported by ID"""
+        log_storage.save_record(Record(id="good", data={"value": 1}))
+        log_storage._append([("bad", 3, b'bad\t{"value": \n')])
+
+        with pytest.raises(StorageError, match="bad"):
+            log_storage.load_all_records()
+
+    def test_compact(self, log_storage):
+        """Test that compaction keeps only live records"""
+        for i in range(5):
+            log_storage.save_record(Record(id="a", data={"value": i}))
+        log_storage.save_record(Record(id="b", data={"value": "gone"}))
+        log_storage.delete_record("b")
+        size_before = os.path.getsize(log_storage.log_path)
+
+        log_storage.compact()
+        assert os.path.getsize(log_storage.log_path) < size_before
+        assert log_storage.list_records() == ["a"]
+        assert log_storage.load_record("a").data == {"value": 4}
+
+    def test_reopen_from_checkpoint(self, log_storage, sample_user, sample_database, sample_table):
+        """Test that a checkpointed index is loaded and only later lines are scanned"""
+        log_storage.save_record(Record(id="a", data={"value": 1}))
+        log_storage.save_record(Record(id="b", data={"value": 2}))
+        log_storage.checkpoint()
+        log_storage.delete_record("b")
+        log_storage.save_record(Record(id="c", data={"value": 3}))
+
+        reopened = LogTableStorage(sample_user, sample_database, sample_table)
+        assert sorted(reopened.list_records()) == ["a", "c"]
+        assert reopened.load_record("a").data == {"value": 1}
+
+        # A checkpoint of a log that has since been replaced is ignored
+        log_storage.compact()
+        with open(log_storage.index_path, "w") as f:
+            f.write("1\t5\nghost\t0\t1\n")
+        reopened = LogTableStorage(sample_user, sample_database, sample_table)
+        assert sorted(reopened.list_records()) == ["a", "c"]
+
+    def test_checkpoint_records_indexed_log(self, log_storage, monkeypatch, sample_user, sample_database, sample_table):
+        """Test that a checkpoint names the log its index was built from, even if compacted meanwhile"""
+        for i in range(5):
+            log_storage.save_record(Record(id="a", data={"value": i}))
+        indexed_inode = os.stat(log_storage.log_path).st_ino
+        real_refresh = log_storage._refresh
+
+        def refresh_then_compact():
+            real_refresh()
+            LogTableStorage(sample_user, sample_database, sample_table).compact()
+
+        monkeypatch.setattr(log_storage, "_refresh", refresh_then_compact)
+        log_storage.checkpoint()
+        with open(log_storage.index_path) as f:
+            assert f.readline().split("\t")[0] == str(indexed_inode)
+
+        reopened = LogTableStorage(sample_user, sample_database, sample_table)
+        assert reopened.load_record("a").data == {"value": 4}
+
+    def test_damaged_line_reported(self, log_storage, sample_user, sample_database, sample_table):
+        """Test that a log line without a tab is reported with the log and its offset"""
+        log_storage.save_record(Record(id="a", data={"value": 1}))
+        size = os.path.getsize(log_storage.log_path)
+        with open(log_storage.log_path, "ab") as f:
+            f.write(b'garbage\n')
+
+        with pytest.raises(StorageError, match=f"records.log at offset {size}"):
+            LogTableStorage(sample_user, sample_database, sample_table)
+
+    def test_reads_reuse_open_log(self, log_storage, monkeypatch, sample_user, sample_database, sample_table):
+        """Test that lookups read through the kept handle until the log is replaced"""
+        log_storage.save_records_batch([Record(id="a", data={"value": 1}), Record(id="b", data={"value": 2})])
+        log_storage.clear_cache()
+        assert log_storage.load_record("a").data == {"value": 1}
+
+        real_open = os.open
+        opened = []
+        monkeypatch.setattr(os, "open", lambda path, *args, **kwargs: opened.append(path) or real_open(path, *args, **kwargs))
+        assert log_storage.load_record("b").data == {"value": 2}
+        assert log_storage.load_all_records().keys() == {"a", "b"}
+        assert log_storage.log_path not in opened
+
+        LogTableStorage(sample_user, sample_database, sample_table).compact()
+        assert log_storage.load_record("b").data == {"value": 2}
+        assert log_storage.log_path in opened
+
+    def test_compact_waits_for_appends_and_others_reindex(self, log_storage, sample_user, sample_database, sample_table):
+        """Test that compaction waits for held append locks and other instances notice the new log"""
+        other = LogTableStorage(sample_user, sample_database, sample_table)
+        for i in range(5):
+            other.save_record(Record(id="a", data={"value": i}))
+        log_storage.clear_cache()
+
+        with FileSystem.interprocess_lock(log_storage.lock_path, shared=True):
+            compactor = threading.Thread(target=log_storage.compact)
+            compactor.start()
+            compactor.join(0.1)
+            assert compactor.is_alive()
+        compactor.join()
+
+        # Grow the compacted log past the other instance's indexed size
+        log_storage.save_records_batch([Record(id=f"n{i}", data={"value": i}) for i in range(10)])
+        assert len(other) == 11
+        assert other.load_record("a").data == {"value": 4}
+
+
 class TestThreadSafety:
     """Test cases for thread safety"""
 
+    def test_same_path_gets_same_lock(self):
+        """Test that a path always maps to the same striped lock"""
+        manager = LockManager()
+        assert manager.get_lock("data/a.json") is manager.get_lock("data/" + "a.json")
+        assert len({id(manager.get_lock(f"data/{i}.json")) for i in range(1000)}) == LOCK_STRIPES
+
+    def test_writer_waits_for_readers(self):
+        """Test that a writer blocks until the last reader releases, and is then woken"""
+        manager = LockManager()
+        manager.acquire_read("a.json")
+        manager.acquire_read("a.json")
+        writer = threading.Thread(target=lambda: (manager.acquire_write("a.json"), manager.release_write("a.json")))
+        writer.start()
+        manager.release_read("a.json")
+        writer.join(0.1)
+        assert writer.is_alive()
+        manager.release_read("a.json")
+        writer.join(1)
+        assert not writer.is_alive()
+
     def test_concurrent_writes(self, temp_data_dir, sample_user, sample_database, sample_table):
         """Test concurrent writes to different records"""
         table_storage = TableStorage(sample_user, sample_database, sample_table)
@@ -627,6 +1116,98 @@ class TestEdgeCases:
         loaded = table_storage.load_record("large")
         assert len(loaded.data["items"]) == 100
 
+    def test_wide_record_data(self, temp_data_dir, sample_user, sample_database, sample_table):
+        """Test saving and loading a record with many top-level fields"""
+        table_storage = TableStorage(sample_user, sample_database, sample_table)
+
+        wide_data = {f"field_{i}": {"value": i, "tags": [str(i)]} for i in range(1000)}
+        table_storage.save_record(Record(id="wide", data=wide_data))
+
+        loaded = table_storage.load_record("wide")
+        assert loaded.data == wide_data
+
+    def test_short_writes_are_resumed(self, temp_data_dir, monkeypatch):
+        """Test that a file is written in full when writev writes only part of it"""
+        real_writev = os.writev
+        monkeypatch.setattr(os, "writev", lambda fd, buffers: real_writev(fd, [buffers[0][:3]]))
+
+        path = os.path.join(temp_data_dir, "short.json")
+        FileSystem.stream_file(path, ["{", '"a": "é",', ' "b": 2', "}"])
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == '{"a": "é", "b": 2}'
+
+    def test_reads_reuse_buffer_without_stale_bytes(self, temp_data_dir, monkeypatch):
+        """Test that files read through the shared buffer come back exactly, even if they grew"""
+        contents = ["é" * 3000, "short", "", "ü" * 20000 + "end"]
+        for i, content in enumerate(contents):
+            path = os.path.join(temp_data_dir, f"{i}.json")
+            FileSystem.create_file(path, content)
+            assert FileSystem.read_file(path) == content
+
+        # A file larger than its fstat said is still read to the end, growing
+        # a new thread's buffer as it goes
+        real_fstat = os.fstat
+        monkeypatch.setattr(os, "fstat", lambda fd: os.stat_result((0,) * 6 + (0,) + real_fstat(fd)[7:]))
+        results = []
+        reader = threading.Thread(target=lambda: results.append(FileSystem.read_file(os.path.join(temp_data_dir, "3.json"))))
+        reader.start()
+        reader.join()
+        assert results == [contents[3]]
+
+    def test_concurrent_syncs_are_grouped(self, temp_data_dir, monkeypatch):
+        """Test that threads syncing the same folder at once share fsyncs"""
+        calls = []
+        real_fsync = os.fsync
+
+        def slow_fsync(fd):
+            calls.append(fd)
+            time.sleep(0.05)
+            real_fsync(fd)
+
+        monkeypatch.setenv("NATURALDB_DURABILITY", "sync")
+        monkeypatch.setattr(os, "fsync", slow_fsync)
+        threads = [threading.Thread(target=FileSystem.sync_folder, args=(temp_data_dir,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert 1 <= len(calls) < 8
+
+    def test_durability_none_skips_fsync(self, temp_data_dir, monkeypatch):
+        """Test that syncs are no-ops when durability is 'none', and real otherwise"""
+        calls = []
+        monkeypatch.setattr(os, "fsync", calls.append)
+        FileSystem.create_file(os.path.join(temp_data_dir, "a.json"), "{}")
+
+        monkeypatch.setenv("NATURALDB_DURABILITY", "none")
+        FileSystem.create_files(temp_data_dir, [("b.json", ["{}"])], sync=True)
+        FileSystem.sync_file(os.path.join(temp_data_dir, "a.json"))
+        FileSystem.sync_folder(temp_data_dir)
+        assert calls == []
+
+        monkeypatch.setenv("NATURALDB_DURABILITY", "sync")
+        FileSystem.create_files(temp_data_dir, [("c.json", ["{}"])], sync=True)
+        FileSystem.sync_folder(temp_data_dir)
+        assert len(calls) == 2
+
+    def test_list_file_stems(self, temp_data_dir):
+        """Test listing files by suffix, without folders or other files"""
+        for name in ["a.json", "b.json", "c.txt", "d.json.1234.tmp"]:
+            FileSystem.create_file(os.path.join(temp_data_dir, name), "{}")
+        os.mkdir(os.path.join(temp_data_dir, "folder.json"))
+
+        assert sorted(FileSystem.list_file_stems(temp_data_dir, ".json")) == ["a", "b"]
+        assert FileSystem.list_file_stems(os.path.join(temp_data_dir, "missing"), ".json") == []
+
+    def test_read_files_in_folder(self, temp_data_dir):
+        """Test reading several files of a folder, with missing ones as None"""
+        FileSystem.create_file(os.path.join(temp_data_dir, "a.json"), '{"a": 1}')
+        FileSystem.create_file(os.path.join(temp_data_dir, "b.json"), '{"b": 2}')
+
+        contents = FileSystem.read_files(temp_data_dir, ["b.json", "missing.json", "a.json"])
+        assert contents == ['{"b": 2}', None, '{"a": 1}']
+        assert FileSystem.read_files(os.path.join(temp_data_dir, "nope"), ["a.json"]) == [None]
+
 
 class TestIntegration:
     """Integration tests for the complete storage system"""